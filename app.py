@@ -5,23 +5,71 @@ import json
 import re
 import random
 import io
-from collections import Counter
-from datetime import datetime
+import uuid
+import queue
+import atexit
+import threading
+import csv
+import sqlite3
+import zlib
+import itertools
+import functools
+import codecs
+import hashlib
+import tempfile
+import math
+import ast
+import operator
+import importlib
+import importlib.util
+import multiprocessing
+from collections import Counter, OrderedDict
+from contextlib import contextmanager, closing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
 
 # Flask and web-related imports
-from flask import Flask, request, render_template_string, session, send_from_directory, url_for, redirect
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
-import plotly.express as px
-import plotly.io as pio
+from flask import Flask, request, session, send_from_directory, url_for, redirect, jsonify, abort, Response, send_file, stream_with_context, g
+import click
+from markupsafe import escape
+
+class LazyModule:
+    """
+    Stands in for a heavy module and imports it on first attribute access. Workers that only
+    serve the Level 1/2 routes never load pandas, Plotly, Selenium or lxml.
+    """
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None: self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self): return f"<lazy module '{self._name}'>"
+
+# Data, plotting and parsing (visualization, automation and scraper paths)
+np = LazyModule('numpy')
+pd = LazyModule('pandas')
+px = LazyModule('plotly.express')
+pio = LazyModule('plotly.io')
+etree = LazyModule('lxml.etree')
+lxml_html = LazyModule('lxml.html')
 
 # Selenium for Web Scraper
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.common.exceptions import WebDriverException
+webdriver = LazyModule('selenium.webdriver')
+chrome_service = LazyModule('selenium.webdriver.chrome.service')
+chrome_options = LazyModule('selenium.webdriver.chrome.options')
+selenium_by = LazyModule('selenium.webdriver.common.by')
+selenium_wait = LazyModule('selenium.webdriver.support.ui')
+selenium_exceptions = LazyModule('selenium.common.exceptions')
+
+# Async HTTP fetch backend for server-rendered listing pages
+asyncio = LazyModule('asyncio')
+httpx = LazyModule('httpx')
+cookiejar = LazyModule('http.cookiejar')
 
 # Initialize the Flask application
 app = Flask(__name__)
@@ -32,14 +80,91 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 UPLOAD_FOLDER = os.path.join(BASE_DIR, 'uploads')
 SCREENSHOT_FOLDER = os.path.join(BASE_DIR, 'screenshots')
 SCRAPED_DATA_FOLDER = os.path.join(BASE_DIR, 'scraped_data')
+SCRAPE_JOBS_FOLDER = os.path.join(SCRAPED_DATA_FOLDER, 'jobs')
+RFQ_DB_PATH = os.environ.get('RFQ_DB_PATH', os.path.join(SCRAPED_DATA_FOLDER, 'rfq_store.sqlite3'))
 
 # Create necessary directories on startup
-for folder in [UPLOAD_FOLDER, SCREENSHOT_FOLDER, SCRAPED_DATA_FOLDER]:
+for folder in [UPLOAD_FOLDER, SCREENSHOT_FOLDER, SCRAPED_DATA_FOLDER, SCRAPE_JOBS_FOLDER]:
     os.makedirs(folder, exist_ok=True)
 
+# Scrape jobs run on a bounded background pool so web workers are never blocked by Selenium.
+SCRAPER_MAX_WORKERS = int(os.environ.get('SCRAPER_MAX_WORKERS', 2))
+SCRAPE_JOB_HISTORY = int(os.environ.get('SCRAPE_JOB_HISTORY', 100))
+# Parsed visualization uploads stay in memory up to DATASET_CACHE_MB and on disk for DATASET_TTL_SECONDS after last use.
+DATASET_CACHE_BYTES = int(os.environ.get('DATASET_CACHE_MB', 256)) * 1024 * 1024
+DATASET_TTL_SECONDS = int(os.environ.get('DATASET_TTL_SECONDS', 6 * 3600))
+# Plots are reduced to roughly VIZ_POINT_BUDGET marks server-side so the embedded figure stays small.
+VIZ_POINT_BUDGET = int(os.environ.get('VIZ_POINT_BUDGET', 5000))
+VIZ_HISTOGRAM_BINS = int(os.environ.get('VIZ_HISTOGRAM_BINS', 100))
+# At most VIZ_MAX_COLOR_GROUPS colour groups share the budget; beyond that rarer values are folded into "Other".
+VIZ_MAX_COLOR_GROUPS = int(os.environ.get('VIZ_MAX_COLOR_GROUPS', 20))
+# Streaming CSV automation reads and writes CSV_CHUNK_ROWS rows at a time.
+CSV_CHUNK_ROWS = int(os.environ.get('CSV_CHUNK_ROWS', 50000))
+# Uploaded CSVs are typed from their first CSV_SNIFF_ROWS rows; text columns with at most
+# CSV_CATEGORY_MAX_UNIQUE distinct values (repeating on average) are loaded as `category`.
+CSV_SNIFF_ROWS = int(os.environ.get('CSV_SNIFF_ROWS', 10000))
+CSV_CATEGORY_MAX_UNIQUE = int(os.environ.get('CSV_CATEGORY_MAX_UNIQUE', 1000))
+# Files up to CSV_PYARROW_MAX_MB are parsed whole by pyarrow (fastest); larger ones are read in
+# chunks, because a whole-file Arrow table briefly needs several times the final frame's memory.
+CSV_PYARROW_MAX_BYTES = int(os.environ.get('CSV_PYARROW_MAX_MB', 32)) * 1024 * 1024
+# Word counts stream uploads in WORD_COUNT_CHUNK_BYTES reads; uploads over WORD_COUNT_PARALLEL_BYTES
+# are split across WORD_COUNT_WORKERS processes. Results are shown WORD_COUNT_TOP_K words per page.
+WORD_COUNT_CHUNK_BYTES = int(os.environ.get('WORD_COUNT_CHUNK_BYTES', 1024 * 1024))
+WORD_COUNT_PARALLEL_BYTES = int(os.environ.get('WORD_COUNT_PARALLEL_BYTES', 64 * 1024 * 1024))
+WORD_COUNT_WORKERS = int(os.environ.get('WORD_COUNT_WORKERS', os.cpu_count() or 1))
+WORD_COUNT_TOP_K = int(os.environ.get('WORD_COUNT_TOP_K', 50))
+# Warm headless Chrome instances are shared between jobs and recycled after SCRAPER_DRIVER_MAX_USES scrapes.
+SCRAPER_DRIVER_POOL_SIZE = int(os.environ.get('SCRAPER_DRIVER_POOL_SIZE', SCRAPER_MAX_WORKERS))
+SCRAPER_DRIVER_MAX_USES = int(os.environ.get('SCRAPER_DRIVER_MAX_USES', 20))
+SCRAPER_HEADLESS = os.environ.get('SCRAPER_HEADLESS', '1') != '0'
+# Scrolling stops at SCRAPER_TARGET_ITEMS cards (0 = no target), after SCRAPER_SCROLL_IDLE seconds
+# without new cards, or after SCRAPER_MAX_SCROLL_TIME seconds in total.
+SCRAPER_TARGET_ITEMS = int(os.environ.get('SCRAPER_TARGET_ITEMS', 0))
+SCRAPER_LOAD_TIMEOUT = float(os.environ.get('SCRAPER_LOAD_TIMEOUT', 20))
+SCRAPER_SCROLL_IDLE = float(os.environ.get('SCRAPER_SCROLL_IDLE', 3))
+SCRAPER_MAX_SCROLL_TIME = float(os.environ.get('SCRAPER_MAX_SCROLL_TIME', 60))
+# Cards are pulled from the browser in one round trip: 'html' parses the listing once with lxml,
+# 'js' has the browser return structured JSON. SCRAPER_MAX_ITEMS caps the cards parsed (0 = all).
+SCRAPER_EXTRACT_MODE = os.environ.get('SCRAPER_EXTRACT_MODE', 'html')
+SCRAPER_MAX_ITEMS = int(os.environ.get('SCRAPER_MAX_ITEMS', 0))
+# Crawls shard RFQ_START_URLS (comma-separated) across SCRAPER_CRAWL_WORKERS browsers, keep at least
+# SCRAPER_POLITENESS_DELAY seconds between requests to one host and retry WebDriver failures with backoff.
+RFQ_START_URLS = [url.strip() for url in os.environ.get('RFQ_START_URLS', 'https://i.alibaba.com/rfq-page').split(',') if url.strip()]
+SCRAPER_CRAWL_WORKERS = int(os.environ.get('SCRAPER_CRAWL_WORKERS', SCRAPER_DRIVER_POOL_SIZE))
+SCRAPER_POLITENESS_DELAY = float(os.environ.get('SCRAPER_POLITENESS_DELAY', 2.0))
+SCRAPER_MAX_ATTEMPTS = int(os.environ.get('SCRAPER_MAX_ATTEMPTS', 3))
+SCRAPER_RETRY_BACKOFF = float(os.environ.get('SCRAPER_RETRY_BACKOFF', 2.0))
+# SCRAPER_BACKEND picks how listing pages are fetched: 'http' uses one pooled async HTTP client with
+# SCRAPER_HTTP_CONCURRENCY connections, 'selenium' a browser per worker, and 'auto' fetches over HTTP and
+# renders only the pages without server-side RFQ cards in the browser. RFQ_COOKIES_FILE is a cookie export
+# (Netscape cookies.txt or JSON) from a logged-in browser session, sent with every HTTP request.
+SCRAPER_BACKEND = os.environ.get('SCRAPER_BACKEND', 'auto')
+SCRAPER_HTTP_CONCURRENCY = int(os.environ.get('SCRAPER_HTTP_CONCURRENCY', 16))
+SCRAPER_HTTP_TIMEOUT = float(os.environ.get('SCRAPER_HTTP_TIMEOUT', 20))
+# A 429's Retry-After is honoured up to SCRAPER_RETRY_AFTER_MAX seconds.
+SCRAPER_RETRY_AFTER_MAX = float(os.environ.get('SCRAPER_RETRY_AFTER_MAX', 300))
+SCRAPER_USER_AGENT = os.environ.get('SCRAPER_USER_AGENT', 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36')
+RFQ_COOKIES_FILE = os.environ.get('RFQ_COOKIES_FILE', '')
+# The /api/v1/<task> batch API takes at most API_MAX_BATCH inputs per JSON request; NDJSON bodies
+# are processed API_MAX_BATCH lines at a time.
+API_MAX_BATCH = int(os.environ.get('API_MAX_BATCH', 10000))
+# Fibonacci requests are limited to FIB_MAX_TERMS terms (or index n), which keeps every number under
+# Python's 4300-digit int-to-str limit. Pages and JSON show up to FIB_INLINE_TERMS terms inline; longer
+# sequences stream FIB_CHUNK_TERMS terms per chunk and stop after FIB_TIME_LIMIT seconds.
+FIB_MAX_TERMS = int(os.environ.get('FIB_MAX_TERMS', 20000))
+FIB_INLINE_TERMS = int(os.environ.get('FIB_INLINE_TERMS', 1000))
+FIB_CHUNK_TERMS = int(os.environ.get('FIB_CHUNK_TERMS', 500))
+FIB_TIME_LIMIT = float(os.environ.get('FIB_TIME_LIMIT', 10))
+FIB_CACHE_TERMS = int(os.environ.get('FIB_CACHE_TERMS', 1000))
+# Per-route and per-stage latencies are exported on /metrics. With PROFILING_ENABLED=1, a request sent
+# with an `X-Profile: 1` header is profiled (pyinstrument if installed, else cProfile) into PROFILES_FOLDER.
+METRICS_BUCKETS = [float(b) for b in os.environ.get('METRICS_BUCKETS', '0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10,30,60').split(',')]
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', '0') == '1'
+PROFILER = os.environ.get('PROFILER', 'auto')
+PROFILES_FOLDER = os.environ.get('PROFILES_FOLDER', os.path.join(BASE_DIR, 'profiles'))
+
 # --- UI Components (CSS, JS, HTML) ---
 BASE_CSS = """
-<style>
     :root {
         --bg-color: #f4f7f6; --card-color: #ffffff; --font-color: #333333;
         --primary-color: #007BFF; --primary-hover: #0056b3; --border-color: #dee2e6;
@@ -83,7 +208,7 @@ BASE_CSS = """
         transition: background-color 0.2s ease-in-out;
     }
     .button-link:hover { background-color: var(--primary-hover); }
-    input[type="text"], input[type="email"], input[type="password"], input[type="url"], input[type="number"], select, input[type="file"] {
+    input[type="text"], input[type="email"], input[type="password"], input[type="url"], input[type="number"], input[type="date"], select, input[type="file"], textarea {
         width: 100%; padding: 0.8rem; margin-bottom: 1rem; border: 1px solid var(--border-color);
         border-radius: 4px; background-color: var(--input-bg); color: var(--font-color);
         box-sizing: border-box; transition: border-color 0.2s, box-shadow 0.2s;
@@ -134,10 +259,8 @@ BASE_CSS = """
     }
     input:checked + .slider { background-color: var(--primary-color); }
     input:checked + .slider:before { transform: translateX(26px); }
-</style>
 """
 THEME_SWITCH_JS = """
-<script>
     const themeSwitch = document.getElementById('themeSwitch');
     function getTheme() { return localStorage.getItem('theme') || 'light'; }
     function setTheme(theme) {
@@ -152,8 +275,13 @@ THEME_SWITCH_JS = """
             setTheme(newTheme);
         });
     }
-</script>
 """
+# CSS and JS are served as long-lived, ETag-versioned static assets instead of being inlined in every page.
+STATIC_ASSETS = {
+    'base.css': (BASE_CSS, 'text/css'),
+    'theme.js': (THEME_SWITCH_JS, 'application/javascript'),
+}
+ASSET_VERSIONS = {name: hashlib.sha256(body.encode('utf-8')).hexdigest()[:16] for name, (body, _) in STATIC_ASSETS.items()}
 BASE_TEMPLATE = f"""
 <!DOCTYPE html>
 <html lang="en">
@@ -161,7 +289,7 @@ BASE_TEMPLATE = f"""
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>{{{{ title }}}} | Cognifyz Tasks</title>
-    {BASE_CSS}
+    <link rel="stylesheet" href="/assets/base.css?v={ASSET_VERSIONS['base.css']}">
 </head>
 <body>
     <header>
@@ -175,109 +303,1194 @@ BASE_TEMPLATE = f"""
         {{{{ content | safe }}}}
     </main>
     <footer><p>Built with Flask & ❤️</p></footer>
-    {THEME_SWITCH_JS}
+    <script src="/assets/theme.js?v={ASSET_VERSIONS['theme.js']}"></script>
 </body>
 </html>
 """
+# Compiled once at startup and shared by every request, instead of render_template_string re-parsing it.
+BASE_PAGE = app.jinja_env.from_string(BASE_TEMPLATE)
+
+def render_page(title, content): return BASE_PAGE.render(title=title, content=content)
+
+@functools.lru_cache(maxsize=256)
+def render_static_page(title, content):
+    """render_page for content that never changes (home page, empty task forms), rendered once per process."""
+    return render_page(title, content)
+
+# --- Metrics & Profiling ---
+class MetricsRegistry:
+    """
+    Thread-safe counters and histograms for this process, rendered in the Prometheus text format.
+    Each gunicorn worker keeps its own registry, so /metrics reports the worker that answers it.
+    """
+    def __init__(self, buckets):
+        self.buckets = sorted(buckets)
+        self._lock = threading.Lock()
+        self._help = {}
+        self._counters = {}
+        self._histograms = {}  # (name, labels) -> [count per bucket..., +Inf count, sum]
+
+    def describe(self, name, kind, text): self._help[name] = (kind, text)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock: self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            series = self._histograms.setdefault(key, [0] * (len(self.buckets) + 2))
+            for idx, bound in enumerate(self.buckets):
+                if value <= bound: series[idx] += 1
+            series[-2] += 1; series[-1] += value
+
+    @staticmethod
+    def _label_text(labels):
+        escape = lambda value: str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels) + "}" if labels else ""
+
+    def render(self):
+        with self._lock: counters, histograms = dict(self._counters), {key: list(series) for key, series in self._histograms.items()}
+        lines = []
+        for name in sorted({key[0] for key in [*counters, *histograms]}):
+            kind, text = self._help.get(name, ('untyped', name))
+            lines += [f"# HELP {name} {text}", f"# TYPE {name} {kind}"]
+            for (series_name, labels), value in sorted(counters.items()):
+                if series_name == name: lines.append(f"{name}{self._label_text(labels)} {value}")
+            for (series_name, labels), series in sorted(histograms.items()):
+                if series_name != name: continue
+                for bound, count in zip([*map(str, self.buckets), '+Inf'], series):
+                    lines.append(f"{name}_bucket{self._label_text([*labels, ('le', bound)])} {count}")
+                lines += [f"{name}_sum{self._label_text(labels)} {series[-1]}", f"{name}_count{self._label_text(labels)} {series[-2]}"]
+        return "\n".join(lines) + "\n"
+
+METRICS = MetricsRegistry(METRICS_BUCKETS)
+METRICS.describe('http_requests_total', 'counter', "Requests handled, by route, method and status.")
+METRICS.describe('http_request_duration_seconds', 'histogram', "Time to build each response; streamed bodies count up to their first chunk.")
+METRICS.describe('stage_duration_seconds', 'histogram', "Time spent in each stage of the scraper and visualization hot paths.")
+
+@contextmanager
+def stage_timer(task, stage):
+    """Records the time spent in the `with` block under stage_duration_seconds{task, stage}."""
+    started = time.perf_counter()
+    try: yield
+    finally: METRICS.observe('stage_duration_seconds', time.perf_counter() - started, task=task, stage=stage)
+
+def _start_profiler():
+    """A started (kind, profiler) pair: pyinstrument when installed (or PROFILER=pyinstrument), else cProfile."""
+    if PROFILER == 'pyinstrument' or (PROFILER == 'auto' and importlib.util.find_spec('pyinstrument')):
+        profiler = importlib.import_module('pyinstrument').Profiler()
+        profiler.start()
+        return 'pyinstrument', profiler
+    profiler = importlib.import_module('cProfile').Profile()
+    profiler.enable()
+    return 'cprofile', profiler
+
+def _save_profile(kind, profiler, route):
+    """Stops `profiler` and writes its report to PROFILES_FOLDER; returns the file name."""
+    os.makedirs(PROFILES_FOLDER, exist_ok=True)
+    stem = f"{datetime.now():%Y%m%d-%H%M%S}_{re.sub(r'[^A-Za-z0-9]+', '-', route).strip('-') or 'root'}_{uuid.uuid4().hex[:8]}"
+    if kind == 'pyinstrument':
+        profiler.stop()
+        with open(os.path.join(PROFILES_FOLDER, stem + '.html'), 'w', encoding='utf-8') as fh: fh.write(profiler.output_html())
+        return stem + '.html'
+    profiler.disable()
+    profiler.dump_stats(os.path.join(PROFILES_FOLDER, stem + '.prof'))  # open with `python -m pstats` or snakeviz
+    return stem + '.prof'
+
+@app.before_request
+def _start_request_metrics():
+    g.request_started = time.perf_counter()
+    if PROFILING_ENABLED and request.headers.get('X-Profile') == '1': g.profiler = _start_profiler()
+
+@app.after_request
+def _record_request_metrics(response):
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    if (profiler := g.pop('profiler', None)): response.headers['X-Profile-File'] = _save_profile(*profiler, route)
+    if (started := g.pop('request_started', None)) is not None:
+        METRICS.observe('http_request_duration_seconds', time.perf_counter() - started, route=route, method=request.method)
+    METRICS.inc('http_requests_total', route=route, method=request.method, status=response.status_code)
+    return response
 
 # --- Helper Functions & Core Logic ---
 
-def run_alibaba_scraper():
+def create_chrome_driver():
     """
-    Launches Selenium to scrape RFQ data from Alibaba, using a local chromedriver.
+    Builds a Chrome WebDriver from the local chromedriver. This is the only place the
+    Service/Options setup lives; the driver pool calls it whenever it needs a fresh browser.
     """
-    try:
-        driver_name = 'chromedriver.exe' if sys.platform.startswith('win') else 'chromedriver'
-        chromedriver_path = os.path.join(BASE_DIR, driver_name)
-        if not os.path.exists(chromedriver_path):
-            return f"Error: ChromeDriver not found at {chromedriver_path}."
-        service = Service(executable_path=chromedriver_path)
-        chrome_options = Options()
-        chrome_options.add_argument("--start-maximized")
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-    except WebDriverException as e:
-        return f"Error: WebDriver failed to start. Details: {e}"
-
-    # --- MODIFIED: Use the new target URL ---
-    url = "https://i.alibaba.com/rfq-page"
-    driver.get(url)
-    
-    time.sleep(5) 
-
-    for _ in range(5):
-        driver.execute_script("window.scrollBy(0, 1000);")
-        time.sleep(1.5)
-    time.sleep(3)
-    
-    # This selector is specific and may need to be updated for the new URL.
-    cards = driver.find_elements(By.CSS_SELECTOR, "div.brh-rfq-item")
-    if not cards:
-        driver.quit()
-        return "Error: No RFQ items found with the current selectors on this page. The page structure might be different from what the scraper expects."
-    
-    main_window = driver.current_window_handle
+    driver_name = 'chromedriver.exe' if sys.platform.startswith('win') else 'chromedriver'
+    chromedriver_path = os.path.join(BASE_DIR, driver_name)
+    if not os.path.exists(chromedriver_path):
+        raise FileNotFoundError(f"ChromeDriver not found at {chromedriver_path}.")
+    service = chrome_service.Service(executable_path=chromedriver_path)
+    options = chrome_options.Options()
+    if SCRAPER_HEADLESS: options.add_argument("--headless=new")
+    for arg in ["--window-size=1920,1080", "--disable-gpu", "--no-sandbox", "--disable-dev-shm-usage"]:
+        options.add_argument(arg)
+    return webdriver.Chrome(service=service, options=options)
+
+class DriverPool:
+    """
+    A bounded pool of warm WebDriver sessions. At most `size` browsers exist at once;
+    a driver is health-checked before it is handed out, has its cookies and storage
+    wiped when it comes back, and is replaced after `max_uses` jobs or any WebDriver crash.
+    """
+    def __init__(self, size, max_uses, factory=create_chrome_driver):
+        self.size, self.max_uses, self.factory = size, max_uses, factory
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._closed = False
+
+    @staticmethod
+    def _is_healthy(driver):
+        try:
+            driver.current_url  # Any command round trip fails if the browser or session died.
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _quit(driver):
+        try: driver.quit()
+        except Exception: pass
+
+    def _checkout(self):
+        while True:
+            try: entry = self._idle.get_nowait()
+            except queue.Empty: return {'driver': self.factory(), 'uses': 0}
+            if self._is_healthy(entry['driver']): return entry
+            self._quit(entry['driver'])
+
+    def _reset(self, driver):
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        # delete_all_cookies() only reaches the current page's domain; CDP clears the cookies of every host the job visited.
+        try: driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+        except Exception: driver.delete_all_cookies()
+        try: driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        except selenium_exceptions.WebDriverException: pass  # Pages such as about:blank have no storage to clear.
+        try: driver.execute_cdp_cmd('Network.clearBrowserCache', {})
+        except Exception: pass
+        driver.get("about:blank")
+
+    def _checkin(self, entry):
+        entry['uses'] += 1
+        if self._closed or entry['uses'] >= self.max_uses:
+            self._quit(entry['driver'])
+            return
+        try:
+            self._reset(entry['driver'])
+            self._idle.put(entry)
+        except Exception:
+            self._quit(entry['driver'])
+
+    @contextmanager
+    def driver(self):
+        """Yields a ready driver; crashed drivers are discarded instead of returned to the pool."""
+        self._slots.acquire()
+        entry = None
+        try:
+            entry = self._checkout()
+            yield entry['driver']
+        except selenium_exceptions.WebDriverException:
+            if entry: self._quit(entry['driver'])
+            entry = None
+            raise
+        finally:
+            if entry: self._checkin(entry)
+            self._slots.release()
+
+    def close(self):
+        self._closed = True
+        while True:
+            try: self._quit(self._idle.get_nowait()['driver'])
+            except queue.Empty: return
+
+DRIVER_POOL = DriverPool(SCRAPER_DRIVER_POOL_SIZE, SCRAPER_DRIVER_MAX_USES)
+atexit.register(DRIVER_POOL.close)
+
+RFQ_CARD_SELECTOR = "div.brh-rfq-item"
+_PAGE_STATE_JS = "return [document.querySelectorAll(arguments[0]).length, document.body ? document.body.scrollHeight : 0];"
+
+def scroll_until_loaded(driver, selector=RFQ_CARD_SELECTOR, target_count=None, load_timeout=None, idle_timeout=None, max_time=None, poll=0.2):
+    """
+    Scrolls an infinite-scroll listing using explicit waits instead of fixed sleeps.
+    Waits up to `load_timeout` for the first item, then keeps scrolling while each scroll
+    makes the item count or page height grow within `idle_timeout`. Stops early once
+    `target_count` items are present or `max_time` has elapsed. Returns the item count.
+    """
+    target_count = SCRAPER_TARGET_ITEMS if target_count is None else target_count
+    load_timeout = SCRAPER_LOAD_TIMEOUT if load_timeout is None else load_timeout
+    idle_timeout = SCRAPER_SCROLL_IDLE if idle_timeout is None else idle_timeout
+    max_time = SCRAPER_MAX_SCROLL_TIME if max_time is None else max_time
+    page_state = lambda d: d.execute_script(_PAGE_STATE_JS, selector)
+
+    try: selenium_wait.WebDriverWait(driver, load_timeout, poll_frequency=poll).until(lambda d: page_state(d)[0] > 0)
+    except selenium_exceptions.TimeoutException: return 0
+
+    deadline = time.monotonic() + max_time
+    count, height = page_state(driver)
+    while not (target_count and count >= target_count):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0: break
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        try:
+            selenium_wait.WebDriverWait(driver, min(idle_timeout, remaining), poll_frequency=poll).until(
+                lambda d: (state := page_state(d))[0] > count or state[1] > height)
+        except selenium_exceptions.TimeoutException:
+            break  # The page stopped growing.
+        count, height = page_state(driver)
+    return count
+
+RFQ_FIELDS = ["RFQ ID", "Title", "Buyer Name", "Buyer Image", "Inquiry Time", "Quotes Left", "Country", "Quantity Required", "Email Confirmed", "Experienced Buyer", "Inquiry URL", "Inquiry Date", "Scraping Date"]
+
+def _rfq_row(fields, scraping_date):
+    """Maps raw card fields (None = element missing) onto an RFQ row, or None without a subject link."""
+    if fields.get('title') is None: return None
+    data = dict.fromkeys(RFQ_FIELDS, "N/A")
+    data["Title"] = fields['title']
+    data["Inquiry URL"] = "https:" + (fields.get('href') or "")
+    for key, column in [('buyer', "Buyer Name"), ('buyer_image', "Buyer Image"), ('posted', "Inquiry Time"), ('quotes_left', "Quotes Left"), ('country', "Country")]:
+        if fields.get(key) is not None: data[column] = fields[key]
+    data["Inquiry Date"] = data["Inquiry Time"]
+    data["Scraping Date"] = scraping_date
+    return data
+
+def _css_class(name): return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+# XPath equivalents of the card CSS selectors, shared by every parse and compiled on first use.
+_RFQ_CARD_PATH = f"//div[{_css_class('brh-rfq-item')}]"
+_RFQ_FIELD_PATHS = {
+    'title': (f".//a[{_css_class('brh-rfq-item__subject-link')}]", None),
+    'href': (f".//a[{_css_class('brh-rfq-item__subject-link')}]", 'href'),
+    'buyer': (f".//div[{_css_class('brh-rfq-item__other-info')}]//div[{_css_class('text')}]", None),
+    'buyer_image': (f".//div[{_css_class('brh-rfq-item__other-info')}]//img", 'src'),
+    'posted': (f".//div[{_css_class('brh-rfq-item__publishtime')}]", None),
+    'quotes_left': (f".//div[{_css_class('brh-rfq-item__quote-left')}]//span", None),
+    'country': (f".//div[{_css_class('brh-rfq-item__country')}]//img", 'alt'),
+}
+
+@functools.cache
+def _rfq_xpaths():
+    """Compiled (card XPath, {field: (XPath, attribute)}) pair; built once, on the first parse."""
+    return etree.XPath(_RFQ_CARD_PATH), {key: (etree.XPath(path), attr) for key, (path, attr) in _RFQ_FIELD_PATHS.items()}
+
+def rfq_key(rfq_id, inquiry_url):
+    """Store key for an RFQ: its ID when the page exposes one, otherwise its inquiry URL."""
+    return rfq_id if rfq_id and rfq_id != "N/A" else inquiry_url
+
+def _is_known(key, known_keys, seen_keys):
+    if not known_keys or key not in known_keys: return False
+    if seen_keys is not None: seen_keys.append(key)
+    return True
+
+def parse_rfq_card(card, scraping_date, known_keys=None, seen_keys=None):
+    """
+    Extracts one `div.brh-rfq-item` lxml element into an RFQ row. Cards whose key is in
+    `known_keys` are not parsed further; their key is appended to `seen_keys` instead.
+    """
+    field_xpaths = _rfq_xpaths()[1]
+    if known_keys and (link := field_xpaths['href'][0](card)):
+        if _is_known(rfq_key(None, "https:" + (link[0].get('href') or "")), known_keys, seen_keys): return None
+    fields = {}
+    for key, (xpath, attr) in field_xpaths.items():
+        if not (found := xpath(card)): fields[key] = None
+        elif attr: fields[key] = found[0].get(attr) or ""
+        else: fields[key] = "".join(part.strip() for part in found[0].itertext())
+    return _rfq_row(fields, scraping_date)
+
+def parse_rfq_listing(html, limit=None, scraping_date=None, known_keys=None, seen_keys=None):
+    """
+    Parses every RFQ card in `html` (a full page or concatenated card markup) from a
+    single lxml parse, using precompiled XPath selectors instead of a soup per card.
+    """
+    return _parse_rfq_cards(_rfq_cards(html), limit, scraping_date, known_keys, seen_keys)
+
+def _rfq_cards(html): return _rfq_xpaths()[0](lxml_html.document_fromstring(html)) if html and html.strip() else []
+
+def _parse_rfq_cards(cards, limit=None, scraping_date=None, known_keys=None, seen_keys=None):
+    scraping_date = scraping_date or datetime.now().strftime("%Y-%m-%d")
     results = []
-    
-    for idx, card in enumerate(cards[:10], 1): # Limit to 10 for demonstration
+    for idx, card in enumerate(cards[:limit] if limit else cards, 1):
         try:
-            soup = BeautifulSoup(card.get_attribute("outerHTML"), "lxml")
-            data = {k: "N/A" for k in ["RFQ ID", "Title", "Buyer Name", "Buyer Image", "Inquiry Time", "Quotes Left", "Country", "Quantity Required", "Email Confirmed", "Experienced Buyer", "Inquiry URL", "Inquiry Date", "Scraping Date"]}
-
-            title_tag = soup.select_one("a.brh-rfq-item__subject-link")
-            if not title_tag: continue
-
-            data["Title"] = title_tag.get_text(strip=True)
-            data["Inquiry URL"] = "https:" + title_tag.get("href", "")
-            
-            if (buyer := soup.select_one("div.brh-rfq-item__other-info div.text")): data["Buyer Name"] = buyer.get_text(strip=True)
-            if (buyer_img := soup.select_one("div.brh-rfq-item__other-info img")): data["Buyer Image"] = buyer_img.get('src')
-            if (posted := soup.select_one("div.brh-rfq-item__publishtime")): data["Inquiry Time"] = posted.get_text(strip=True)
-            data["Inquiry Date"] = data["Inquiry Time"]
-            if (quote := soup.select_one("div.brh-rfq-item__quote-left span")): data["Quotes Left"] = quote.get_text(strip=True)
-            if (country_img := soup.select_one("div.brh-rfq-item__country img")): data["Country"] = country_img.get('alt')
-            
-            data["Scraping Date"] = datetime.now().strftime("%Y-%m-%d")
-
-            results.append(data)
+            if (data := parse_rfq_card(card, scraping_date, known_keys, seen_keys)): results.append(data)
         except Exception as e:
             print(f"Error processing card {idx}: {e}")
+    return results
+
+_CARD_HTML_JS = "return Array.from(document.querySelectorAll(arguments[0]), el => el.outerHTML);"
+_CARD_FIELDS_JS = """
+const text = (card, sel) => { const el = card.querySelector(sel); return el ? el.textContent.trim() : null; };
+const attr = (card, sel, name) => { const el = card.querySelector(sel); return el ? (el.getAttribute(name) || '') : null; };
+return Array.from(document.querySelectorAll(arguments[0]), card => ({
+    title: text(card, 'a.brh-rfq-item__subject-link'), href: attr(card, 'a.brh-rfq-item__subject-link', 'href'),
+    buyer: text(card, 'div.brh-rfq-item__other-info div.text'), buyer_image: attr(card, 'div.brh-rfq-item__other-info img', 'src'),
+    posted: text(card, 'div.brh-rfq-item__publishtime'), quotes_left: text(card, 'div.brh-rfq-item__quote-left span'),
+    country: attr(card, 'div.brh-rfq-item__country img', 'alt'),
+}));
+"""
+
+def extract_rfq_rows(driver, mode=None, limit=None, known_keys=None, seen_keys=None):
+    """
+    Pulls every RFQ card out of the loaded page with one WebDriver round trip and returns
+    (cards_found, rows). Replaces the per-card outerHTML calls and per-card soup parses.
+    Cards already in `known_keys` are skipped and reported through `seen_keys`.
+    """
+    mode, limit = mode or SCRAPER_EXTRACT_MODE, limit if limit is not None else SCRAPER_MAX_ITEMS
+    scraping_date = datetime.now().strftime("%Y-%m-%d")
+    if mode == 'js':
+        items = driver.execute_script(_CARD_FIELDS_JS, RFQ_CARD_SELECTOR)
+        new_items = [item for item in (items[:limit] if limit else items) if not _is_known(rfq_key(None, "https:" + (item.get('href') or "")), known_keys, seen_keys)]
+        return len(items), [row for item in new_items if (row := _rfq_row(item, scraping_date))]
+    card_html = driver.execute_script(_CARD_HTML_JS, RFQ_CARD_SELECTOR)
+    rows = parse_rfq_listing("".join(card_html[:limit] if limit else card_html), scraping_date=scraping_date, known_keys=known_keys, seen_keys=seen_keys)
+    return len(card_html), rows
+
+def extract_rfq_rows_from_html(html, limit=None, known_keys=None, seen_keys=None):
+    """(cards_found, rows) for fetched listing HTML, the HTTP backend's counterpart of extract_rfq_rows."""
+    limit = limit if limit is not None else SCRAPER_MAX_ITEMS
+    cards = _rfq_cards(html)
+    return len(cards), _parse_rfq_cards(cards, limit, known_keys=known_keys, seen_keys=seen_keys)
+
+# --- RFQ Store ---
+# Scraped RFQs are upserted into one SQLite table keyed on rfq_key() instead of a new CSV per run.
+_RFQ_COLUMNS = {field: re.sub(r'\W+', '_', field.lower()) for field in RFQ_FIELDS}
+_rfq_store_ready = False
+
+def rfq_store_connect():
+    global _rfq_store_ready
+    conn = sqlite3.connect(RFQ_DB_PATH, timeout=30)
+    if not _rfq_store_ready:
+        columns = ", ".join(f"{column} TEXT" for column in _RFQ_COLUMNS.values())
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"CREATE TABLE IF NOT EXISTS rfqs (rfq_key TEXT PRIMARY KEY, {columns}, first_seen TEXT NOT NULL, last_seen TEXT NOT NULL)")
+        conn.execute("CREATE INDEX IF NOT EXISTS rfqs_first_seen ON rfqs (first_seen)")
+        conn.execute("CREATE INDEX IF NOT EXISTS rfqs_last_seen ON rfqs (last_seen)")
+        conn.commit()
+        _rfq_store_ready = True
+    return conn
+
+def rfq_store_keys():
+    with closing(rfq_store_connect()) as conn:
+        return {key for (key,) in conn.execute("SELECT rfq_key FROM rfqs")}
+
+def upsert_rfqs(rows, seen_at=None):
+    """Inserts new RFQs and refreshes stored ones; returns the number that were new."""
+    seen_at = seen_at or datetime.now().isoformat(timespec='seconds')
+    records = {rfq_key(row["RFQ ID"], row["Inquiry URL"]): row for row in rows}
+    columns = list(_RFQ_COLUMNS.values())
+    sql = (f"INSERT INTO rfqs (rfq_key, {', '.join(columns)}, first_seen, last_seen) VALUES ({', '.join('?' * (len(columns) + 3))}) "
+           f"ON CONFLICT(rfq_key) DO UPDATE SET {', '.join(f'{c} = excluded.{c}' for c in columns)}, last_seen = excluded.last_seen")
+    with closing(rfq_store_connect()) as conn, conn:
+        # Hold the write lock across both counts so concurrent crawl workers' inserts are not attributed to this page.
+        conn.execute("BEGIN IMMEDIATE")
+        before = conn.execute("SELECT COUNT(*) FROM rfqs").fetchone()[0]
+        conn.executemany(sql, ([key, *(row[field] for field in _RFQ_COLUMNS), seen_at, seen_at] for key, row in records.items()))
+        return conn.execute("SELECT COUNT(*) FROM rfqs").fetchone()[0] - before
+
+def touch_rfqs(keys, seen_at=None):
+    """Marks already-stored RFQs as seen again without re-parsing or rewriting them."""
+    seen_at = seen_at or datetime.now().isoformat(timespec='seconds')
+    with closing(rfq_store_connect()) as conn, conn:
+        conn.executemany("UPDATE rfqs SET last_seen = ? WHERE rfq_key = ?", ((seen_at, key) for key in set(keys)))
+
+def _parse_range_bound(value, is_end=False):
+    """Accepts YYYY-mm-dd or an ISO timestamp; a bare end date includes that whole day."""
+    if not value: return None
+    bound = datetime.fromisoformat(value)
+    if is_end and len(value) == 10: bound += timedelta(days=1)
+    return bound.isoformat(timespec='seconds')
+
+def export_rfqs_csv(start=None, end=None, by='last_seen', batch_size=1000):
+    """Yields the stored RFQs as CSV text, optionally limited to a first/last-seen date range."""
+    if by not in ('first_seen', 'last_seen'): raise ValueError("Filter must be 'first_seen' or 'last_seen'.")
+    clauses, params = [], []
+    if (start := _parse_range_bound(start)): clauses.append(f"{by} >= ?"); params.append(start)
+    if (end := _parse_range_bound(end, is_end=True)): clauses.append(f"{by} < ?"); params.append(end)
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    buffer = io.StringIO(); writer = csv.writer(buffer)
+    writer.writerow([*RFQ_FIELDS, "First Seen", "Last Seen"])
+    yield "\ufeff" + buffer.getvalue()  # utf-8-sig, matching the per-run CSVs Excel users already open.
+    with closing(rfq_store_connect()) as conn:
+        cursor = conn.execute(f"SELECT {', '.join(_RFQ_COLUMNS.values())}, first_seen, last_seen FROM rfqs{where} ORDER BY first_seen, rfq_key", params)
+        while (batch := cursor.fetchmany(batch_size)):
+            buffer.seek(0); buffer.truncate()
+            writer.writerows(batch)
+            yield buffer.getvalue()
+
+# --- Crawl Scheduler ---
+class HostRateLimiter:
+    """Spaces requests to the same host at least `delay` seconds apart, across all crawl workers."""
+    def __init__(self, delay):
+        self.delay = delay
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, url):
+        """Books the next free slot for the URL's host and returns how long to wait for it."""
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.delay
+            return slot - now
+
+    def wait(self, url): time.sleep(self.reserve(url))
+    async def wait_async(self, url): await asyncio.sleep(self.reserve(url))
+
+class CrawlFrontier:
+    """
+    The URL frontier of one crawl, persisted in the RFQ store so a crashed crawl can be resumed
+    by running it again with the same crawl ID. Each URL is hashed onto one of `shards` workers;
+    a worker claims its own shard first and steals from the others once it runs dry.
+    """
+    def __init__(self, crawl_id, shards):
+        self.crawl_id, self.shards = crawl_id, max(shards, 1)
+        with closing(rfq_store_connect()) as conn, conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS crawl_frontier (crawl_id TEXT NOT NULL, url TEXT NOT NULL, shard INTEGER NOT NULL, status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, next_attempt_at REAL NOT NULL DEFAULT 0, last_error TEXT, PRIMARY KEY (crawl_id, url))")
+            # URLs left in progress (or waiting for a browser) by a crashed run are handed out again.
+            conn.execute("UPDATE crawl_frontier SET status = 'pending' WHERE crawl_id = ? AND status IN ('in_progress', 'browser')", (crawl_id,))
+
+    def add(self, urls):
+        with closing(rfq_store_connect()) as conn, conn:
+            conn.executemany("INSERT OR IGNORE INTO crawl_frontier (crawl_id, url, shard, status) VALUES (?, ?, ?, 'pending')",
+                             ((self.crawl_id, url, zlib.crc32(url.encode()) % self.shards) for url in urls))
+
+    def claim(self, shard):
+        """Returns (url, attempts) for the next due URL, 'wait' while retries or other workers are outstanding, or None when done."""
+        with closing(rfq_store_connect()) as conn:
+            conn.isolation_level = None
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT url, attempts FROM crawl_frontier WHERE crawl_id = ? AND status = 'pending' AND next_attempt_at <= ? ORDER BY shard = ? DESC, next_attempt_at LIMIT 1", (self.crawl_id, time.time(), shard % self.shards)).fetchone()
+                if row:
+                    conn.execute("UPDATE crawl_frontier SET status = 'in_progress' WHERE crawl_id = ? AND url = ?", (self.crawl_id, row[0]))
+                    return row
+                outstanding = conn.execute("SELECT COUNT(*) FROM crawl_frontier WHERE crawl_id = ? AND status IN ('pending', 'in_progress')", (self.crawl_id,)).fetchone()[0]
+                return 'wait' if outstanding else None
+            finally:
+                conn.execute("COMMIT")
+
+    def _set(self, url, status, error=None, next_attempt_at=0):
+        with closing(rfq_store_connect()) as conn, conn:
+            conn.execute("UPDATE crawl_frontier SET status = ?, attempts = attempts + 1, last_error = ?, next_attempt_at = ? WHERE crawl_id = ? AND url = ?", (status, error, next_attempt_at, self.crawl_id, url))
+
+    def complete(self, url): self._set(url, 'done')
+    def defer(self, url):
+        """Parks a URL the HTTP backend could not scrape until release_deferred() hands it to the browser workers."""
+        with closing(rfq_store_connect()) as conn, conn:
+            conn.execute("UPDATE crawl_frontier SET status = 'browser' WHERE crawl_id = ? AND url = ?", (self.crawl_id, url))
+
+    def release_deferred(self):
+        with closing(rfq_store_connect()) as conn, conn:
+            return conn.execute("UPDATE crawl_frontier SET status = 'pending' WHERE crawl_id = ? AND status = 'browser'", (self.crawl_id,)).rowcount
+    def fail(self, url, error): self._set(url, 'failed', error)
+    def retry(self, url, error, delay): self._set(url, 'pending', error, time.time() + delay)
+
+    def counts(self):
+        with closing(rfq_store_connect()) as conn:
+            return dict(conn.execute("SELECT status, COUNT(*) FROM crawl_frontier WHERE crawl_id = ? GROUP BY status", (self.crawl_id,)).fetchall())
+
+    def errors(self):
+        with closing(rfq_store_connect()) as conn:
+            return conn.execute("SELECT url, last_error FROM crawl_frontier WHERE crawl_id = ? AND status = 'failed'", (self.crawl_id,)).fetchall()
+
+def _crawl_worker(frontier, shard, limiter, known_keys, totals, lock, progress):
+    while (claim := frontier.claim(shard)) is not None:
+        if claim == 'wait':
+            time.sleep(0.5)
+            continue
+        url, attempts = claim
+        try:
+            limiter.wait(url)
+            with DRIVER_POOL.driver() as driver:
+                result = scrape_rfq_page(driver, url, known_keys)
+        except selenium_exceptions.WebDriverException as e:
+            _retry_or_fail(frontier, url, attempts, f"WebDriver failed. Details: {e}")
+            continue
+        except Exception as e:
+            frontier.fail(url, str(e))
             continue
-    
-    driver.quit()
+        _record_page(frontier, url, result, totals, lock, progress)
+
+def _retry_or_fail(frontier, url, attempts, error, min_delay=0):
+    """Schedules a retry with jittered exponential backoff (at least `min_delay`), or fails the URL after SCRAPER_MAX_ATTEMPTS."""
+    if attempts + 1 >= SCRAPER_MAX_ATTEMPTS: frontier.fail(url, error)
+    else: frontier.retry(url, error, max(SCRAPER_RETRY_BACKOFF * 2 ** attempts * random.uniform(0.5, 1.5), min_delay))
+
+def _retry_after_seconds(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or an HTTP date), capped at SCRAPER_RETRY_AFTER_MAX; 0 if absent or unparseable."""
+    if not value: return 0
+    try: seconds = float(value) if value.strip().isdigit() else (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+    except (TypeError, ValueError): return 0
+    return min(max(seconds, 0), SCRAPER_RETRY_AFTER_MAX)
+
+def _record_page(frontier, url, result, totals, lock, progress):
+    """Marks a scraped page done (or failed, for an error string) and adds its counts to the crawl totals."""
+    if isinstance(result, str):
+        frontier.fail(url, result)
+        return
+    frontier.complete(url)
+    with lock:
+        totals['new'] += result['new']
+        totals['refreshed'] += result['refreshed']
+        counts = frontier.counts()
+        progress(f"Crawled {counts.get('done', 0)} of {sum(counts.values())} pages ({counts.get('failed', 0)} failed, {totals['new']} new RFQs)")
+
+def crawl_rfq_pages(urls, crawl_id, workers=None, progress=None, backend=None):
+    """
+    Crawls RFQ listing pages and merges every page into the RFQ store, over HTTP and/or with a
+    pool of browser workers depending on `backend` (default SCRAPER_BACKEND). Re-running with the
+    same `crawl_id` resumes the unfinished URLs of that crawl.
+    Returns the merged totals plus the frontier's per-status counts and failures.
+    """
+    progress, backend = progress or (lambda message: None), backend or SCRAPER_BACKEND
+    if backend not in ('auto', 'http', 'selenium'): raise ValueError("Backend must be 'auto', 'http' or 'selenium'.")
+    urls, workers = urls or [], workers or SCRAPER_CRAWL_WORKERS
+    workers = max(1, min(workers, len(urls) or workers))
+    frontier = CrawlFrontier(crawl_id, workers)
+    frontier.add(urls)
+    totals, lock = {'new': 0, 'refreshed': 0}, threading.Lock()
+    known_keys, limiter = rfq_store_keys(), HostRateLimiter(SCRAPER_POLITENESS_DELAY)
+    if backend != 'selenium':
+        progress(f"Fetching {len(urls)} pages over HTTP with up to {SCRAPER_HTTP_CONCURRENCY} connections")
+        asyncio.run(http_crawl(frontier, limiter, known_keys, totals, lock, progress, fallback=backend == 'auto'))
+        if not (deferred := frontier.release_deferred()): return {**totals, 'pages': frontier.counts(), 'errors': frontier.errors()}
+        progress(f"Rendering {deferred} pages without server-side RFQ cards in the browser")
+    progress(f"Crawling {len(urls)} pages with {workers} browsers" if backend == 'selenium' else f"Crawling with {workers} browsers")
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'crawl-{crawl_id[:8]}') as pool:
+        for future in [pool.submit(_crawl_worker, frontier, shard, limiter, known_keys, totals, lock, progress) for shard in range(workers)]:
+            future.result()
+    return {**totals, 'pages': frontier.counts(), 'errors': frontier.errors()}
+
+def run_alibaba_scraper(urls=None, progress=None, crawl_id=None):
+    """
+    Crawls the Alibaba RFQ listing `urls` (default RFQ_START_URLS) into the RFQ store.
+    Returns a summary dict ({'new', 'refreshed', 'seen_at', 'pages', 'failed'}) or an error string.
+    `progress` is an optional callback receiving short status messages.
+    """
+    seen_at = datetime.now().isoformat(timespec='seconds')
+    totals = crawl_rfq_pages(urls or RFQ_START_URLS, crawl_id or uuid.uuid4().hex, progress=progress)
+    done, failed = totals['pages'].get('done', 0), totals['pages'].get('failed', 0)
+    if not done:
+        return f"Error: {totals['errors'][0][1]}" if totals['errors'] else "Error: No pages were crawled."
+    return {'new': totals['new'], 'refreshed': totals['refreshed'], 'seen_at': seen_at, 'pages': done, 'failed': failed}
+
+def scrape_rfq_page(driver, url, known_keys=None):
+    """Loads one RFQ listing page and upserts its new cards. Returns counts or an error string."""
+    with stage_timer('scraper', 'load'): driver.get(url)
+    with stage_timer('scraper', 'scroll'): scroll_until_loaded(driver)
 
-    if not results:
+    # The card selectors are specific and may need to be updated for the new URL.
+    seen_keys = []
+    with stage_timer('scraper', 'extract'): cards_found, results = extract_rfq_rows(driver, known_keys=known_keys, seen_keys=seen_keys)
+    if not cards_found:
+        return "Error: No RFQ items found with the current selectors on this page. The page structure might be different from what the scraper expects."
+    return save_rfq_rows(results, seen_keys, known_keys)
+
+def save_rfq_rows(results, seen_keys, known_keys=None):
+    """Upserts one page's new rows and refreshes its already-known ones. Returns counts or an error string."""
+    if not results and not seen_keys:
         return "Error: Scraped 0 RFQs. The selectors might be outdated for this page."
 
-    df = pd.DataFrame(results)
-    filename = f"alibaba_rfq_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-    df.to_csv(os.path.join(SCRAPED_DATA_FOLDER, filename), index=False, encoding="utf-8-sig")
-    
-    return filename
+    seen_at = datetime.now().isoformat(timespec='seconds')
+    with stage_timer('scraper', 'save'):
+        new_count = upsert_rfqs(results, seen_at)
+        touch_rfqs(seen_keys, seen_at)
+    if known_keys is not None: known_keys.update(rfq_key(row["RFQ ID"], row["Inquiry URL"]) for row in results)
+    return {'new': new_count, 'refreshed': len(results) - new_count + len(set(seen_keys))}
+
+# --- HTTP Fetch Backend ---
+# Server-rendered listing pages are fetched with one pooled, keep-alive async client (gzip is negotiated
+# by default) and parsed with the same selectors as browser pages. Pages without RFQ cards in their
+# HTML need JavaScript; with fallback on they are parked for the browser workers.
+class NeedsBrowser(Exception):
+    """The fetched page has no server-rendered RFQ cards, or turned a plain HTTP client away."""
+
+def load_cookie_jar(path):
+    """Cookies from a browser export: a Netscape cookies.txt or a JSON list of {name, value, domain, path}."""
+    cookies = httpx.Cookies()
+    if not path: return cookies
+    with open(path, encoding='utf-8') as fh: text = fh.read()
+    if text.lstrip().startswith(('[', '{')):
+        data = json.loads(text)
+        for cookie in (data.get('cookies', []) if isinstance(data, dict) else data):
+            cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain', ''), path=cookie.get('path', '/'))
+    else:
+        jar = cookiejar.MozillaCookieJar(path)
+        jar.load(ignore_discard=True, ignore_expires=True)
+        for cookie in jar: cookies.set(cookie.name, cookie.value, domain=cookie.domain, path=cookie.path)
+    return cookies
+
+def scrape_rfq_html(html, known_keys=None):
+    """Parses a fetched listing page and upserts its new cards. Raises NeedsBrowser when it has no cards."""
+    seen_keys = []
+    with stage_timer('scraper', 'extract'): cards_found, results = extract_rfq_rows_from_html(html, known_keys=known_keys, seen_keys=seen_keys)
+    if not cards_found: raise NeedsBrowser("No RFQ items in the page HTML; it needs JavaScript rendering.")
+    return save_rfq_rows(results, seen_keys, known_keys)
+
+async def _http_crawl_worker(client, frontier, shard, limiter, known_keys, totals, lock, progress, fallback):
+    while (claim := await asyncio.to_thread(frontier.claim, shard)) is not None:
+        if claim == 'wait':
+            await asyncio.sleep(0.5)
+            continue
+        url, attempts = claim
+        try:
+            await limiter.wait_async(url)
+            with stage_timer('scraper', 'fetch'): response = await client.get(url)
+            if response.status_code in (401, 403): raise NeedsBrowser(f"HTTP {response.status_code} for a plain HTTP client.")
+            if response.status_code == 429 or response.status_code >= 500:
+                retry_after = _retry_after_seconds(response.headers.get('Retry-After')) if response.status_code == 429 else 0
+                await asyncio.to_thread(_retry_or_fail, frontier, url, attempts, f"HTTP {response.status_code}", retry_after)
+                continue
+            response.raise_for_status()
+            result = await asyncio.to_thread(scrape_rfq_html, response.text, known_keys)
+        except NeedsBrowser as e:
+            if fallback: await asyncio.to_thread(frontier.defer, url)
+            else: await asyncio.to_thread(frontier.fail, url, str(e))
+            continue
+        except httpx.TransportError as e:
+            await asyncio.to_thread(_retry_or_fail, frontier, url, attempts, f"HTTP request failed. Details: {e!r}")
+            continue
+        except Exception as e:
+            await asyncio.to_thread(frontier.fail, url, str(e))
+            continue
+        await asyncio.to_thread(_record_page, frontier, url, result, totals, lock, progress)
+
+async def http_crawl(frontier, limiter, known_keys, totals, lock, progress, fallback=True, concurrency=None):
+    """Drains `frontier` with `concurrency` fetch tasks sharing one connection pool."""
+    concurrency = concurrency or SCRAPER_HTTP_CONCURRENCY
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency, keepalive_expiry=30)
+    async with httpx.AsyncClient(limits=limits, timeout=SCRAPER_HTTP_TIMEOUT, follow_redirects=True, cookies=load_cookie_jar(RFQ_COOKIES_FILE),
+                                 headers={'User-Agent': SCRAPER_USER_AGENT, 'Accept': 'text/html,application/xhtml+xml'}) as client:
+        await asyncio.gather(*(_http_crawl_worker(client, frontier, shard, limiter, known_keys, totals, lock, progress, fallback) for shard in range(concurrency)))
+
+# --- Background Scrape Jobs ---
+# Job records are persisted as small JSON files so any gunicorn worker can report
+# on a job, while the scrape itself runs on the executor of the worker that accepted it.
+SCRAPE_EXECUTOR = ThreadPoolExecutor(max_workers=SCRAPER_MAX_WORKERS, thread_name_prefix='scraper')
+SCRAPE_JOBS_LOCK = threading.Lock()
+JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+def _job_path(job_id): return os.path.join(SCRAPE_JOBS_FOLDER, f"{job_id}.json")
+
+def load_scrape_job(job_id):
+    if not JOB_ID_PATTERN.match(job_id or ""): return None
+    try:
+        with open(_job_path(job_id), encoding='utf-8') as fh: return json.load(fh)
+    except (OSError, ValueError): return None
+
+def _save_scrape_job(job):
+    tmp_path = _job_path(job['id']) + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as fh: json.dump(job, fh)
+    os.replace(tmp_path, _job_path(job['id']))
+
+def update_scrape_job(job_id, **changes):
+    with SCRAPE_JOBS_LOCK:
+        job = load_scrape_job(job_id)
+        if job is None: return None
+        job.update(changes, updated_at=datetime.now().isoformat(timespec='seconds'))
+        _save_scrape_job(job)
+        return job
+
+def _prune_scrape_jobs():
+    """Keeps only the newest SCRAPE_JOB_HISTORY job records on disk."""
+    entries = sorted(os.scandir(SCRAPE_JOBS_FOLDER), key=lambda e: e.stat().st_mtime, reverse=True)
+    for entry in [e for e in entries if e.name.endswith('.json')][SCRAPE_JOB_HISTORY:]:
+        try: os.remove(entry.path)
+        except OSError: pass
+
+def _run_scrape_job(job_id, urls):
+    update_scrape_job(job_id, status='running', started_at=datetime.now().isoformat(timespec='seconds'))
+    try:
+        result = run_alibaba_scraper(urls, progress=lambda message: update_scrape_job(job_id, progress=message), crawl_id=job_id)
+    except Exception as e:
+        update_scrape_job(job_id, status='failed', error=f"Unexpected scraper error: {e}", finished_at=datetime.now().isoformat(timespec='seconds'))
+        return
+    if isinstance(result, dict):
+        update_scrape_job(job_id, status='finished', result=result, progress='Done', finished_at=datetime.now().isoformat(timespec='seconds'))
+    else:
+        update_scrape_job(job_id, status='failed', error=result, finished_at=datetime.now().isoformat(timespec='seconds'))
+
+def submit_scrape_job(urls=None):
+    """Queues a crawl of `urls` (default RFQ_START_URLS) on the background executor and returns its job ID."""
+    now = datetime.now().isoformat(timespec='seconds')
+    urls = list(dict.fromkeys(urls or RFQ_START_URLS))
+    job = {'id': uuid.uuid4().hex, 'status': 'queued', 'progress': 'Waiting for a free scraper slot', 'urls': urls, 'result': None, 'error': None, 'created_at': now, 'updated_at': now, 'started_at': None, 'finished_at': None}
+    with SCRAPE_JOBS_LOCK:
+        _save_scrape_job(job)
+        _prune_scrape_jobs()
+    SCRAPE_EXECUTOR.submit(_run_scrape_job, job['id'], urls)
+    return job['id']
+
+
+# --- Plot Data Reduction ---
+def _as_numeric(series):
+    """Float view of a numeric or datetime column for the decimation maths, or None."""
+    if pd.api.types.is_datetime64_any_dtype(series): return series.astype('int64').to_numpy(dtype=float)
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series): return series.to_numpy(dtype=float)
+    return None
 
-def generate_visualization(df, plot_type, x_col, y_col, color_col):
-    # ...This function remains unchanged...
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: positions of `n_out` points that keep the visual shape of a sorted (x, y) line."""
+    n = len(x)
+    if n_out >= n or n_out < 3: return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    picked = np.empty(n_out, dtype=int)
+    picked[0], picked[-1], anchor = 0, n - 1, 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+        area = np.abs((x[anchor] - avg_x) * (y[start:end] - y[anchor]) - (x[anchor] - x[start:end]) * (avg_y - y[anchor]))
+        anchor = start + int(np.nanargmax(area)) if not np.isnan(area).all() else start
+        picked[i + 1] = anchor
+    return picked
+
+def minmax_indices(y, n_out):
+    """Min/max decimation: the lowest and highest point of each of n_out/2 equal-width buckets, in original order."""
+    n = len(y)
+    if n_out >= n: return np.arange(n)
+    buckets = pd.Series(y).groupby(np.arange(n) * max(n_out // 2, 1) // n)
+    return np.unique(np.concatenate([buckets.idxmin().dropna().to_numpy(dtype=int), buckets.idxmax().dropna().to_numpy(dtype=int), [0, n - 1]]))
+
+def _decimate_line(group, x_col, y_col, budget):
+    x, y = _as_numeric(group[x_col]), _as_numeric(group[y_col])
+    if len(group) <= budget: return group
+    if y is None: return group.iloc[np.linspace(0, len(group) - 1, budget).astype(int)]
+    if x is not None and group[x_col].is_monotonic_increasing: return group.iloc[lttb_indices(x, y, budget)]
+    return group.iloc[minmax_indices(y, budget)]
+
+def _fold_rare(series, keep):
+    """`series` with every non-null value outside its `keep` most frequent ones replaced by "Other"."""
+    top = series.value_counts().index[:keep]
+    return series.astype(object).where(series.isin(top) | series.isna(), "Other")
+
+def _prebin_histogram(df, x_col, color_col, bins, budget):
+    """
+    Counts per bin (numeric/datetime x) or per value (categorical x), so the figure holds bins, not rows.
+    Returns (counts, folded): colour groups past VIZ_MAX_COLOR_GROUPS and categorical x values past the
+    budget are folded into "Other", so the bar count stays bounded however many distinct values there are.
+    """
+    if color_col == x_col: color_col = None  # bars coloured by their own x value need no separate groups
+    values, folded = _as_numeric(df[x_col]), False
+    n_groups = df[color_col].nunique() if color_col else 1
+    if n_groups > VIZ_MAX_COLOR_GROUPS:
+        df, n_groups, folded = df.assign(**{color_col: _fold_rare(df[color_col], VIZ_MAX_COLOR_GROUPS - 1)}), VIZ_MAX_COLOR_GROUPS, True
+    if values is None and df[x_col].nunique() > (per_group := max(budget // n_groups, 2)):
+        df, folded = df.assign(**{x_col: _fold_rare(df[x_col], per_group - 1)}), True
+    groups = df.groupby(color_col, observed=True, sort=False) if color_col else [(None, df)]
+    frames = []
+    if values is not None:
+        finite = values[np.isfinite(values)]
+        edges = np.histogram_bin_edges(finite, bins=bins) if len(finite) else np.array([0.0, 1.0])
+        centers = (edges[:-1] + edges[1:]) / 2
+        if pd.api.types.is_datetime64_any_dtype(df[x_col]): centers = pd.to_datetime(centers.astype('int64'))
+        for key, group in groups:
+            group_values = _as_numeric(group[x_col])
+            counts, _ = np.histogram(group_values[np.isfinite(group_values)], bins=edges)
+            frames.append(pd.DataFrame({x_col: centers, 'count': counts, **({color_col: key} if color_col else {})}))
+    else:
+        for key, group in groups:
+            counts = group[x_col].value_counts(sort=False)
+            frames.append(pd.DataFrame({x_col: counts.index, 'count': counts.to_numpy(), **({color_col: key} if color_col else {})}))
+    return pd.concat(frames, ignore_index=True), folded
+
+def reduce_plot_data(df, plot_type, x_col, y_col, color_col, budget):
+    """
+    Shrinks a DataFrame to about `budget` plotted marks before Plotly sees it.
+    Returns (plot_df, note, prebinned) where `note` describes any reduction and `prebinned`
+    means a histogram was replaced by bin counts in a 'count' column.
+    """
+    columns = [c for c in dict.fromkeys([x_col, y_col if plot_type != 'histogram' else None, color_col]) if c]
+    df, total = df[columns], len(df)
+    if plot_type == 'histogram':
+        if total <= budget: return df, "", False
+        counts, folded = _prebin_histogram(df, x_col, color_col, VIZ_HISTOGRAM_BINS, budget)
+        return counts, f"Histogram of {total:,} rows pre-binned on the server." + (' Less frequent values are grouped as "Other".' if folded else ''), True
+    if total <= budget: return df, "", False
+    if plot_type == 'line' and (not color_col or df[color_col].nunique() <= VIZ_MAX_COLOR_GROUPS):
+        groups = df.groupby(color_col, observed=True, sort=False) if color_col else [(None, df)]
+        per_group = max(budget // max(len(groups), 1), 3)
+        reduced = pd.concat([_decimate_line(group, x_col, y_col, per_group) for _, group in groups])
+        return reduced, f"Showing {len(reduced):,} of {total:,} points (LTTB / min-max downsampled).", False
+    # Lines with more colour groups than VIZ_MAX_COLOR_GROUPS fall through to even sampling below.
+    if plot_type == 'bar' and pd.api.types.is_numeric_dtype(df[y_col]) and y_col not in (x_col, color_col):
+        keys = list(dict.fromkeys([x_col, color_col] if color_col else [x_col]))
+        reduced = df.groupby(keys, observed=True, sort=False)[y_col].sum().reset_index()
+        note = f"Aggregated {total:,} rows into {len(reduced):,} bars (sum of {y_col})."
+        per_x = max(budget // (reduced[color_col].nunique() if color_col and color_col != x_col else 1), 1)
+        if reduced[x_col].nunique() > per_x:
+            top = reduced.groupby(x_col, observed=True)[y_col].sum().abs().nlargest(per_x).index
+            reduced = reduced[reduced[x_col].isin(top)]
+            note += f" Showing the {per_x:,} largest {x_col} values."
+        return reduced, note, False
+    if plot_type == 'scatter':
+        x, y = _as_numeric(df[x_col]), _as_numeric(df[y_col])
+        reduced = df
+        if x is not None and y is not None:
+            # Keep one point per cell of a grid about sqrt(budget) wide; overplotted points add nothing visible.
+            side = max(int(budget ** 0.5), 1)
+            cells = pd.DataFrame({'x': pd.cut(x, side, labels=False), 'y': pd.cut(y, side, labels=False)}, index=df.index)
+            if color_col: cells['c'] = df[color_col]
+            reduced = df[~cells.duplicated()]
+        if len(reduced) > budget: reduced = reduced.sample(budget, random_state=0)
+        return reduced, f"Showing {len(reduced):,} of {total:,} points (grid-thinned scatter).", False
+    reduced = df.iloc[np.linspace(0, total - 1, budget).astype(int)]
+    return reduced, f"Showing {len(reduced):,} of {total:,} rows (evenly sampled).", False
+
+def generate_visualization(df, plot_type, x_col, y_col, color_col, point_budget=None):
     try:
         theme = request.cookies.get('theme', 'light')
         template = 'plotly_dark' if theme == 'dark' else 'plotly_white'
+        with stage_timer('visualization', 'reduce'):
+            df, note, prebinned = reduce_plot_data(df, plot_type, x_col, y_col, color_col, point_budget or VIZ_POINT_BUDGET)
+            # Datasets keep a float column as float32 only when that is exact, so widening it back gives the uploaded values.
+            if (float32 := [c for c in df.columns if df[c].dtype == 'float32']): df = df.assign(**{c: df[c].astype('float64') for c in float32})
         fig = None
-        if plot_type == 'scatter': fig = px.scatter(df, x=x_col, y=y_col, color=color_col, title=f"{y_col.title()} vs. {x_col.title()}", template=template)
-        elif plot_type == 'bar': fig = px.bar(df, x=x_col, y=y_col, color=color_col, title=f"Bar Chart of {y_col.title()} by {x_col.title()}", template=template)
-        elif plot_type == 'line': fig = px.line(df, x=x_col, y=y_col, color=color_col, title=f"Line Chart of {y_col.title()} over {x_col.title()}", template=template)
-        elif plot_type == 'histogram': fig = px.histogram(df, x=x_col, color=color_col, title=f"Histogram of {x_col.title()}", template=template)
+        with stage_timer('visualization', 'figure'):
+            # Plotly Express already switches scatter/line traces to WebGL above 1,000 points (render_mode='auto').
+            if plot_type == 'scatter': fig = px.scatter(df, x=x_col, y=y_col, color=color_col, title=f"{y_col.title()} vs. {x_col.title()}", template=template)
+            elif plot_type == 'bar': fig = px.bar(df, x=x_col, y=y_col, color=color_col, title=f"Bar Chart of {y_col.title()} by {x_col.title()}", template=template)
+            elif plot_type == 'line': fig = px.line(df, x=x_col, y=y_col, color=color_col, title=f"Line Chart of {y_col.title()} over {x_col.title()}", template=template)
+            elif plot_type == 'histogram' and prebinned:
+                fig = px.bar(df, x=x_col, y='count', color=color_col, title=f"Histogram of {x_col.title()}", template=template)
+                fig.update_layout(bargap=0)
+            elif plot_type == 'histogram': fig = px.histogram(df, x=x_col, color=color_col, title=f"Histogram of {x_col.title()}", template=template)
+            if fig: fig.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font_color= 'var(--font-color)')
         if fig:
-            fig.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font_color= 'var(--font-color)')
-            return pio.to_html(fig, full_html=False, include_plotlyjs='cdn')
+            note_html = f"<p><em>{note}</em></p>" if note else ""
+            with stage_timer('visualization', 'serialize'): return note_html + pio.to_html(fig, full_html=False, include_plotlyjs='cdn')
         return "<p>Invalid plot type selected.</p>"
     except Exception as e:
         return f"<p>Error generating plot: {e}. Please check your column selections.</p>"
 
 
+# --- CSV Ingestion ---
+# Uploads are read through one layer: column types are sniffed from a sample and pinned so every
+# engine and chunk parses alike, pyarrow does the parsing when installed, integers are downcast
+# losslessly and repetitive text becomes `category`. For plotting, floats drop to float32 where that is exact.
+CSV_ENGINE = 'pyarrow' if importlib.util.find_spec('pyarrow') else 'c'
+
+def sniff_csv_schema(file, sample_rows=None):
+    """
+    {column: 'int' | 'bigint' | 'float' | 'category' | 'text' | 'other'} from the first rows of a seekable
+    CSV file. 'bigint' columns hold integers beyond int64, which only the C parser keeps exact.
+    """
+    start = file.tell()
+    try: sample = pd.read_csv(file, nrows=sample_rows or CSV_SNIFF_ROWS)
+    finally: file.seek(start)
+    schema = {}
+    for column, series in sample.items():
+        if pd.api.types.is_bool_dtype(series): schema[column] = 'other'
+        elif pd.api.types.is_integer_dtype(series): schema[column] = 'bigint' if series.dtype == 'uint64' else 'int'
+        elif pd.api.types.is_float_dtype(series): schema[column] = 'float'
+        elif pd.api.types.is_string_dtype(series):
+            distinct = series.nunique()
+            schema[column] = 'category' if distinct <= CSV_CATEGORY_MAX_UNIQUE and distinct * 2 <= series.notna().sum() else 'text'
+        else: schema[column] = 'bigint' if series.dtype == object and any(type(value) is int for value in series) else 'other'
+    # A blank makes an integer column float64 in the sample; its text tells 1 (with gaps) from 1.0.
+    if (gappy := [column for column, series in sample.items() if schema[column] == 'float' and series.isna().any() and (series.dropna() % 1 == 0).all()]):
+        try: text = pd.read_csv(file, nrows=sample_rows or CSV_SNIFF_ROWS, usecols=gappy, dtype=str)
+        finally: file.seek(start)
+        schema.update({column: 'int' for column in gappy if text[column].dropna().str.fullmatch(r'[+-]?\d+').all()})
+    return schema
+
+def _text_dtypes(schema, usecols=None):
+    return {column: 'str' for column, kind in schema.items() if kind in ('category', 'text') and (usecols is None or column in usecols)}
+
+def optimize_dtypes(df, schema, plot=False, keep=()):
+    """
+    Shrinks `df` in place: integers to the smallest type that holds them, sniffed low-cardinality text
+    to `category` and, when `plot`, floats to float32 if every value survives the round trip. Columns in
+    `keep` are left as read.
+    """
+    for column in df.columns:
+        if column in keep: continue
+        series = df[column]
+        if pd.api.types.is_integer_dtype(series) and not pd.api.types.is_extension_array_dtype(series):
+            df[column] = pd.to_numeric(series, downcast='integer')
+        elif plot and series.dtype == 'float64':
+            with np.errstate(over='ignore'): narrowed = series.astype('float32')
+            if narrowed.astype('float64').equals(series): df[column] = narrowed
+        elif schema.get(column) == 'category' and pd.api.types.is_string_dtype(series):
+            df[column] = series.astype('category')
+    return df
+
+def concat_chunks(chunks):
+    """pd.concat that keeps categorical columns categorical by taking the union of every chunk's categories."""
+    for column in chunks[0].columns:
+        if any(isinstance(chunk[column].dtype, pd.CategoricalDtype) for chunk in chunks):
+            categories = pd.api.types.union_categoricals([chunk[column].astype('category') for chunk in chunks]).categories
+            for chunk in chunks: chunk[column] = pd.Categorical(chunk[column], categories=categories)
+    return pd.concat(chunks, ignore_index=True)
+
+def read_csv_frame(file, usecols=None, plot=False, keep=()):
+    """
+    Reads a whole uploaded CSV through the ingestion layer. Files up to CSV_PYARROW_MAX_BYTES are
+    parsed by pyarrow in one multithreaded pass; larger ones (or ones pyarrow would read differently:
+    rejected rows, duplicate header names, integers beyond int64) go through the C parser
+    CSV_CHUNK_ROWS rows at a time, each chunk shrunk as it arrives so peak memory stays
+    near the optimized frame's size.
+    """
+    schema = sniff_csv_schema(file)
+    if usecols is not None and (missing := [column for column in usecols if column not in schema]):
+        raise ValueError(f"Column not found: {', '.join(missing)}.")
+    dtype, start = _text_dtypes(schema, usecols), file.tell()
+    size = file.seek(0, os.SEEK_END) - start; file.seek(start)
+    if CSV_ENGINE == 'pyarrow' and size <= CSV_PYARROW_MAX_BYTES and 'bigint' not in schema.values():
+        try: df = pd.read_csv(file, engine='pyarrow', usecols=usecols, dtype=dtype)
+        except Exception: df = None  # e.g. ragged rows, which the C parser pads
+        # pyarrow keeps duplicate header names, where the C parser (and so the schema) has a, a.1.
+        if df is not None and df.columns.is_unique and set(df.columns) == set(usecols or schema): return optimize_dtypes(df, schema, plot, keep)
+        file.seek(start)
+    with pd.read_csv(file, usecols=usecols, dtype=dtype, chunksize=CSV_CHUNK_ROWS) as reader:
+        chunks = [optimize_dtypes(chunk, schema, plot, keep) for chunk in reader]
+    return concat_chunks(chunks) if chunks else pd.DataFrame({column: pd.Series(dtype=dtype.get(column, 'float64')) for column in usecols or schema})
+
+def read_csv_chunks(file, chunksize=None):
+    """
+    Chunk reader for the streaming paths. Text and numeric columns are pinned to the sniffed schema
+    (integers as nullable Int64) so no chunk flips type: an int column with a blank in one chunk would
+    otherwise turn float64 there, print 1 as 1.0 and hash differently for dedupe.
+    """
+    schema = sniff_csv_schema(file)
+    numeric = {column: {'int': 'Int64', 'float': 'float64'}[kind] for column, kind in schema.items() if kind in ('int', 'float')}
+    return pd.read_csv(file, dtype={**_text_dtypes(schema), **numeric}, chunksize=chunksize or CSV_CHUNK_ROWS)
+
+
+# --- Uploaded Dataset Cache ---
+# Each upload gets a dataset ID. The parsed DataFrame is kept in an in-process LRU bounded by
+# memory, with a columnar copy on disk for cache misses (other workers, restarts, evictions).
+DATASET_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+DATASET_EXTENSIONS = ('.parquet', '.pkl')
+
+class DataFrameCache:
+    """A thread-safe LRU of DataFrames bounded by their total deep memory usage."""
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries: return None
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def put(self, key, df):
+        size = int(df.memory_usage(deep=True).sum())
+        with self._lock:
+            self._discard(key)
+            if size > self.max_bytes: return  # Too big to cache; it will be read from disk each time.
+            self._entries[key] = (df, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes: self._discard(next(iter(self._entries)))
+
+    def discard(self, key):
+        with self._lock: self._discard(key)
+
+    def _discard(self, key):
+        if (entry := self._entries.pop(key, None)): self._bytes -= entry[1]
+
+DATASET_CACHE = DataFrameCache(DATASET_CACHE_BYTES)
+
+def _dataset_file(dataset_id):
+    for ext in DATASET_EXTENSIONS:
+        if os.path.exists(path := os.path.join(UPLOAD_FOLDER, f"dataset_{dataset_id}{ext}")): return path
+    return None
+
+def evict_stale_uploads():
+    """Deletes datasets and word-count results not used for DATASET_TTL_SECONDS and drops them from the cache."""
+    cutoff = time.time() - DATASET_TTL_SECONDS
+    for entry in os.scandir(UPLOAD_FOLDER):
+        if entry.name.startswith(('dataset_', 'wordcount_')) and entry.stat().st_mtime < cutoff:
+            if entry.name.startswith('dataset_'): DATASET_CACHE.discard(entry.name[len('dataset_'):].rsplit('.', 1)[0])
+            try: os.remove(entry.path)
+            except OSError: pass
+
+def save_dataset(file):
+    """Parses an uploaded CSV once, stores it under a new dataset ID and returns (dataset_id, df)."""
+    evict_stale_uploads()
+    dataset_id = uuid.uuid4().hex
+    df = read_csv_frame(file, plot=True)
+    base_path = os.path.join(UPLOAD_FOLDER, f"dataset_{dataset_id}")
+    try:
+        df.to_parquet(base_path + '.parquet', index=False)
+    except Exception:  # pyarrow missing, or column types Parquet cannot hold.
+        if os.path.exists(base_path + '.parquet'): os.remove(base_path + '.parquet')
+        df.to_pickle(base_path + '.pkl')
+    DATASET_CACHE.put(dataset_id, df)
+    return dataset_id, df
+
+def load_dataset(dataset_id, columns=None):
+    """
+    Returns the DataFrame for a dataset ID from memory or its columnar copy, or None once expired.
+    With `columns`, only those are returned; a cache miss then reads just them from the Parquet file
+    and leaves the cache alone, since a projection is cheap to re-read.
+    """
+    if not DATASET_ID_PATTERN.match(dataset_id or "") or not (path := _dataset_file(dataset_id)): return None
+    # Sliding TTL: a dataset expires DATASET_TTL_SECONDS after its last use. Another worker's
+    # evict_stale_uploads() may delete the file at any point, which reads as expired too.
+    try: os.utime(path)
+    except OSError: return None
+    if (df := DATASET_CACHE.get(dataset_id)) is not None: return df[columns] if columns else df
+    try:
+        if columns and path.endswith('.parquet'): return pd.read_parquet(path, columns=columns)
+        df = pd.read_parquet(path) if path.endswith('.parquet') else pd.read_pickle(path)
+    except FileNotFoundError: return None
+    DATASET_CACHE.put(dataset_id, df)
+    return df[columns] if columns else df
+
+
+# --- Streaming Word Count ---
+WORD_PATTERN = re.compile(r'\b\w+\b')
+TRAILING_WORD_PATTERN = re.compile(r'\w+$')
+_ASCII_WORD_BYTES = frozenset(b'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_')
+
+def count_words(chunks):
+    """
+    Counts lower-cased words over an iterable of UTF-8 byte chunks. Multi-byte characters split
+    between chunks are decoded incrementally, and a word cut off at the end of a chunk is carried
+    into the next one, so memory is bounded by the chunk size and the vocabulary.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    counts, carry = Counter(), ''
+    for chunk in chunks:
+        text = carry + decoder.decode(chunk)
+        cut = match.start() if (match := TRAILING_WORD_PATTERN.search(text)) else len(text)
+        counts.update(WORD_PATTERN.findall(text[:cut].lower()))
+        carry = text[cut:]
+    counts.update(WORD_PATTERN.findall((carry + decoder.decode(b'', final=True)).lower()))
+    return counts
+
+def _read_chunks(fh, chunk_size, limit=None):
+    while (limit is None or limit > 0) and (chunk := fh.read(chunk_size if limit is None else min(chunk_size, limit))):
+        if limit is not None: limit -= len(chunk)
+        yield chunk
+
+def _count_words_in_range(path, start, end, chunk_size):
+    with open(path, 'rb') as fh:
+        fh.seek(start)
+        return count_words(_read_chunks(fh, chunk_size, end - start))
+
+def _word_boundaries(path, size, parts):
+    """Byte offsets splitting a file into `parts` ranges, each moved forward to an ASCII non-word byte
+    so no word or multi-byte UTF-8 character straddles two ranges."""
+    offsets = [0]
+    with open(path, 'rb') as fh:
+        for nominal in range(size // parts, size, size // parts):
+            fh.seek(max(nominal, offsets[-1]))
+            position = fh.tell()
+            while (byte := fh.read(1)) and (byte[0] >= 0x80 or byte[0] in _ASCII_WORD_BYTES): position += 1
+            if position < size: offsets.append(position)
+    return sorted(set(offsets)) + [size]
+
+def count_words_in_file(source, workers=None, chunk_size=None):
+    """
+    Counts words in a text file without loading it into memory. `source` is a path or a binary
+    file object; paths larger than WORD_COUNT_PARALLEL_BYTES are split across a process pool.
+    """
+    chunk_size, workers = chunk_size or WORD_COUNT_CHUNK_BYTES, workers or WORD_COUNT_WORKERS
+    if not isinstance(source, (str, os.PathLike)): return count_words(_read_chunks(source, chunk_size))
+    size = os.path.getsize(source)
+    if workers < 2 or size <= WORD_COUNT_PARALLEL_BYTES: return _count_words_in_range(source, 0, size, chunk_size)
+    bounds = _word_boundaries(source, size, workers)
+    total = Counter()
+    # Not fork: this process also runs scraper, driver and SQLite threads whose held locks a forked child would inherit.
+    start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(start_method)) as pool:
+        for counts in pool.map(_count_words_in_range, itertools.repeat(source), bounds[:-1], bounds[1:], itertools.repeat(chunk_size)):
+            total.update(counts)
+    return total
+
+def save_word_counts(counts):
+    """Writes counts (most frequent first) as a CSV result file and returns its result ID."""
+    evict_stale_uploads()
+    result_id = uuid.uuid4().hex
+    with open(os.path.join(UPLOAD_FOLDER, f"wordcount_{result_id}.csv"), 'w', encoding='utf-8', newline='') as fh:
+        writer = csv.writer(fh)
+        writer.writerow(['word', 'count'])
+        writer.writerows(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+    with open(os.path.join(UPLOAD_FOLDER, f"wordcount_{result_id}.json"), 'w', encoding='utf-8') as fh:
+        json.dump({'total': sum(counts.values()), 'distinct': len(counts)}, fh)
+    return result_id
+
+def load_word_counts_page(result_id, page, per_page):
+    """Returns (rows, summary) for one page of a saved result, or None if it expired."""
+    if not DATASET_ID_PATTERN.match(result_id or ""): return None
+    csv_path = os.path.join(UPLOAD_FOLDER, f"wordcount_{result_id}.csv")
+    try:
+        with open(os.path.join(UPLOAD_FOLDER, f"wordcount_{result_id}.json"), encoding='utf-8') as fh: summary = json.load(fh)
+        with open(csv_path, encoding='utf-8', newline='') as fh:
+            rows = list(itertools.islice(csv.reader(fh), 1 + (page - 1) * per_page, 1 + page * per_page))
+    except OSError:
+        return None
+    os.utime(csv_path)
+    return rows, summary
+
+# --- Fibonacci Engine ---
+# F(n) comes from fast doubling in O(log n) big-int steps. Sequences read the first FIB_CACHE_TERMS
+# numbers from a table shared by all requests and continue by addition past it, so memory stays bounded.
+def fibonacci_pair(n):
+    """(F(n), F(n + 1)) by fast doubling: F(2k) = F(k)(2F(k+1) - F(k)) and F(2k+1) = F(k)^2 + F(k+1)^2."""
+    a, b = 0, 1
+    for bit in bin(n)[2:]:
+        c, d = a * (2 * b - a), a * a + b * b
+        a, b = (d, c + d) if bit == '1' else (c, d)
+    return a, b
+
+def _fibonacci_from(a, b):
+    while True: yield a; a, b = b, a + b
+
+@functools.cache
+def _fibonacci_prefix():
+    """The first FIB_CACHE_TERMS Fibonacci numbers, built once per process on first use."""
+    return tuple(itertools.islice(_fibonacci_from(0, 1), FIB_CACHE_TERMS))
+
+def fibonacci_number(n):
+    prefix = _fibonacci_prefix()
+    return prefix[n] if n < len(prefix) else fibonacci_pair(n)[0]
+
+def iter_fibonacci(count, start=0):
+    """Yields F(start) .. F(start + count - 1) without building the whole sequence."""
+    if count <= 0: return
+    cached = _fibonacci_prefix()[start:start + count]
+    yield from cached
+    if (remaining := count - len(cached)) > 0:
+        yield from itertools.islice(_fibonacci_from(*fibonacci_pair(start + len(cached))), remaining)
+
+def stream_fibonacci(count, start=0, chunk_terms=None, time_limit=None):
+    """
+    Yields the sequence as comma-separated text, `chunk_terms` numbers per chunk. Stops with a note
+    once `time_limit` seconds have passed, so one request cannot hold a worker indefinitely.
+    """
+    chunk_terms, deadline = chunk_terms or FIB_CHUNK_TERMS, time.monotonic() + (FIB_TIME_LIMIT if time_limit is None else time_limit)
+    terms, sent = iter_fibonacci(count, start), 0
+    while (chunk := list(itertools.islice(terms, chunk_terms))):
+        yield (", " if sent else "") + ", ".join(map(str, chunk))
+        sent += len(chunk)
+        if sent < count and time.monotonic() > deadline:
+            yield f"\n[Stopped after {sent:,} of {count:,} terms: time limit reached.]"
+            break
+    yield "\n"
+
+
 # ... Other helper functions (reverse_string, calculate, etc.) remain unchanged ...
+EMAIL_PATTERN = re.compile(r"^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$")
+PASSWORD_PATTERNS = [re.compile(pattern) for pattern in (r"[a-z]", r"[A-Z]", r"\d", r"\W")]
+PASSWORD_STRENGTH = {0: "Very Weak", 1: "Weak", 2: "Moderate", 3: "Strong", 4: "Very Strong", 5: "Excellent"}
+
 def reverse_string(s): return s[::-1]
 def convert_temperature(value, unit):
     if unit == 'celsius': return f"{value}°C is {(value * 9/5) + 32:.2f}°F"
     if unit == 'fahrenheit': return f"{value}°F is {(value - 32) * 5/9:.2f}°C"
-def validate_email(email): return "Valid Email" if re.match(r"^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$", email) else "Invalid Email"
+def validate_email(email): return "Valid Email" if EMAIL_PATTERN.match(email) else "Invalid Email"
 def calculate(n1, n2, op):
     if op == '+': return n1 + n2
     if op == '-': return n1 - n2
@@ -286,38 +1499,282 @@ def calculate(n1, n2, op):
 def is_palindrome(s):
     cleaned = ''.join(filter(str.isalnum, s)).lower()
     return "It's a palindrome." if cleaned == cleaned[::-1] else "It's not a palindrome."
-def check_password_strength(password):
-    score = sum([1 if len(password) >= 8 else 0, 1 if re.search(r"[a-z]", password) else 0, 1 if re.search(r"[A-Z]", password) else 0, 1 if re.search(r"\d", password) else 0, 1 if re.search(r"\W", password) else 0])
-    strength = {0: "Very Weak", 1: "Weak", 2: "Moderate", 3: "Strong", 4: "Very Strong", 5: "Excellent"}
-    return f"Password strength: {strength.get(score)}"
-def fibonacci_sequence(n):
-    a, b = 0, 1; seq = []
-    for _ in range(n): seq.append(a); a, b = b, a + b
-    return seq
-def count_words_in_file(file_content):
-    words = re.findall(r'\b\w+\b', file_content.lower())
-    return "<br>".join([f"'{w}': {c}" for w, c in sorted(Counter(words).items())])
-def automate_csv_processing(df, column, operation):
-    if column not in df.columns: return None, "Error: Column not found."
+def password_score(password): return int(len(password) >= 8) + sum(1 for pattern in PASSWORD_PATTERNS if pattern.search(password))
+def check_password_strength(password): return f"Password strength: {PASSWORD_STRENGTH[password_score(password)]}"
+def fibonacci_sequence(n): return list(iter_fibonacci(n))
+
+# Array versions of the Level 1 arithmetic for the batch API: one NumPy pass per batch instead of a call per value.
+CALCULATOR_UFUNCS = {'+': 'add', '-': 'subtract', '*': 'multiply', '/': 'divide'}
+
+def convert_temperatures(values, units):
+    """(celsius, fahrenheit) arrays for equal-length `values` and `units` ('celsius' or 'fahrenheit' each)."""
+    values, from_celsius = np.asarray(values, dtype=float), np.asarray(units) == 'celsius'
+    with np.errstate(over='ignore'): return np.where(from_celsius, values, (values - 32) * 5 / 9), np.where(from_celsius, values * 9 / 5 + 32, values)
+
+def calculate_many(n1, n2, ops):
+    """Element-wise `calculate` over equal-length arrays; division by zero gives NaN."""
+    n1, n2, ops = np.asarray(n1, dtype=float), np.asarray(n2, dtype=float), np.asarray(ops)
+    out = np.full(len(n1), np.nan)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for op, ufunc in CALCULATOR_UFUNCS.items():
+            if (mask := ops == op).any(): out[mask] = getattr(np, ufunc)(n1[mask], n2[mask])
+    out[(ops == '/') & (n2 == 0)] = np.nan
+    return out
+
+def transform_csv_chunk(df, column, operation):
     if operation == 'uppercase': df[column] = df[column].astype(str).str.upper()
     elif operation == 'lowercase': df[column] = df[column].astype(str).str.lower()
+    return df
+def automate_csv_processing(df, column, operation):
+    if column not in df.columns: return None, "Error: Column not found."
+    transform_csv_chunk(df, column, operation)
     mem_file = io.BytesIO(); df.to_csv(mem_file, index=False, encoding='utf-8'); mem_file.seek(0)
     return mem_file, None
 
+# --- CSV Pipeline Engine ---
+# A pipeline is a JSON list of steps such as {"op": "strip", "columns": ["name", "city"]}.
+# compile_csv_pipeline() validates the steps once and fuses them: runs of column transforms
+# touch each column once with chained vectorized ops, and runs of filters become one mask.
+def _as_text(series): return series if pd.api.types.is_string_dtype(series) else series.astype(str)
+
+CSV_CASTS = {
+    'int': lambda s: pd.to_numeric(s, errors='coerce').astype('Int64'),
+    'float': lambda s: pd.to_numeric(s, errors='coerce'),
+    'str': lambda s: s.astype(str),
+    'bool': lambda s: s.astype(str).str.strip().str.lower().map({'true': True, '1': True, 'yes': True, 'false': False, '0': False, 'no': False}).astype('boolean'),
+    'datetime': lambda s: pd.to_datetime(s, errors='coerce'),
+}
+CSV_COLUMN_OPS = {
+    'strip': lambda s, step: _as_text(s).str.strip(),
+    'uppercase': lambda s, step: _as_text(s).str.upper(),
+    'lowercase': lambda s, step: _as_text(s).str.lower(),
+    'regex_replace': lambda s, step: _as_text(s).str.replace(step['pattern'], step.get('replacement', ''), regex=True),
+    'fillna': lambda s, step: s.fillna(step['value']),
+    'cast': lambda s, step: CSV_CASTS[step['to']](s),
+}
+CSV_FILTERS = {
+    '==': lambda s, v: s == v, '!=': lambda s, v: s != v, '<': lambda s, v: s < v, '<=': lambda s, v: s <= v,
+    '>': lambda s, v: s > v, '>=': lambda s, v: s >= v, 'in': lambda s, v: s.isin(v),
+    'contains': lambda s, v: _as_text(s).str.contains(v, regex=False, na=False),
+    'matches': lambda s, v: _as_text(s).str.contains(v, regex=True, na=False),
+    'notnull': lambda s, v: s.notna(), 'isnull': lambda s, v: s.isna(),
+}
+
+# A derive 'expr' is a small arithmetic language over columns: column names, numeric literals,
+# + - * / (and unary +/-) and comparisons. It is parsed with ast and evaluated with pandas operators;
+# anything else (calls, attributes, subscripts, strings) is rejected, so it cannot reach DataFrame methods.
+DERIVE_OPERATORS = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv,
+    ast.UAdd: operator.pos, ast.USub: operator.neg,
+    ast.Eq: operator.eq, ast.NotEq: operator.ne, ast.Lt: operator.lt, ast.LtE: operator.le, ast.Gt: operator.gt, ast.GtE: operator.ge,
+}
+
+def parse_derive_expr(expr):
+    """The ast of a derive 'expr'. Raises ValueError if it uses anything outside the whitelist."""
+    try: tree = ast.parse(expr, mode='eval')
+    except SyntaxError as e: raise ValueError(e.msg) from None
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Compare, ast.Name, ast.Load)) or type(node) in DERIVE_OPERATORS: continue
+        if isinstance(node, ast.Constant) and type(node.value) in (int, float): continue
+        raise ValueError("only column names, numbers, + - * / and comparisons are allowed")
+    return tree
+
+def derive_expr_columns(tree): return sorted({node.id for node in ast.walk(tree) if isinstance(node, ast.Name)})
+
+def eval_derive_expr(node, df):
+    """Evaluates a tree from parse_derive_expr against the columns of `df`."""
+    if isinstance(node, ast.Expression): return eval_derive_expr(node.body, df)
+    if isinstance(node, ast.Name): return df[node.id]
+    if isinstance(node, ast.Constant): return node.value
+    if isinstance(node, ast.UnaryOp): return DERIVE_OPERATORS[type(node.op)](eval_derive_expr(node.operand, df))
+    if isinstance(node, ast.BinOp): return DERIVE_OPERATORS[type(node.op)](eval_derive_expr(node.left, df), eval_derive_expr(node.right, df))
+    # a < b < c means (a < b) & (b < c), as in Python
+    operands = [eval_derive_expr(operand, df) for operand in [node.left, *node.comparators]]
+    return functools.reduce(operator.and_, [DERIVE_OPERATORS[type(op)](left, right) for op, left, right in zip(node.ops, operands, operands[1:])])
+
+def _step_columns(step, position):
+    columns = step.get('columns', [step['column']] if 'column' in step else None)
+    if not columns or not isinstance(columns, list) or not all(isinstance(c, str) for c in columns):
+        raise ValueError(f"Step {position} ({step['op']}) needs a 'column' or a list of 'columns'.")
+    return columns
+
+def _validate_step(step, position):
+    if not isinstance(step, dict) or 'op' not in step: raise ValueError(f"Step {position} must be an object with an 'op'.")
+    op = step['op']
+    if op in CSV_COLUMN_OPS:
+        _step_columns(step, position)
+        if op == 'regex_replace':
+            try: re.compile(step['pattern'])
+            except (KeyError, TypeError, re.error) as e: raise ValueError(f"Step {position} (regex_replace) needs a valid 'pattern': {e}")
+        if op == 'fillna' and 'value' not in step: raise ValueError(f"Step {position} (fillna) needs a 'value'.")
+        if op == 'cast' and step.get('to') not in CSV_CASTS: raise ValueError(f"Step {position} (cast) 'to' must be one of {', '.join(CSV_CASTS)}.")
+    elif op == 'filter':
+        if not isinstance(step.get('column'), str) or step.get('cmp') not in CSV_FILTERS: raise ValueError(f"Step {position} (filter) needs a 'column' and a 'cmp' from {', '.join(CSV_FILTERS)}.")
+        if step['cmp'] not in ('notnull', 'isnull') and 'value' not in step: raise ValueError(f"Step {position} (filter) needs a 'value'.")
+    elif op == 'dedupe':
+        if 'columns' in step or 'column' in step: _step_columns(step, position)
+    elif op == 'derive':
+        if not isinstance(step.get('name'), str) or ('expr' in step) == ('concat' in step): raise ValueError(f"Step {position} (derive) needs a 'name' and either an 'expr' or a 'concat' column list.")
+        if 'expr' in step:
+            if not isinstance(step['expr'], str): raise ValueError(f"Step {position} (derive) 'expr' must be a string.")
+            try: parse_derive_expr(step['expr'])
+            except ValueError as e: raise ValueError(f"Step {position} (derive) has an unsupported 'expr': {e}.")
+        if 'concat' in step: _step_columns({'op': op, 'columns': step['concat']}, position)
+    else:
+        raise ValueError(f"Step {position} has unknown op '{op}'. Supported: {', '.join([*CSV_COLUMN_OPS, 'filter', 'dedupe', 'derive'])}.")
+
+class RowHashSet:
+    """
+    The 64-bit row hashes a streaming dedupe has already emitted, as sorted NumPy runs that merge like a
+    binary counter: a lookup is one searchsorted per run (O(log n) runs) and adding n hashes costs
+    O(n log n) in total. Memory is 8 bytes per distinct row, not per chunk. Rows are compared by hash
+    only, so two distinct rows with colliding hashes (odds about n^2 / 2^65) would count as duplicates.
+    """
+    def __init__(self): self._runs = []
+
+    def contains(self, hashes):
+        found = np.zeros(len(hashes), dtype=bool)
+        for run in filter(len, self._runs): found |= run[np.minimum(np.searchsorted(run, hashes), len(run) - 1)] == hashes
+        return found
+
+    def add(self, hashes):
+        """Adds hashes that are not in the set yet."""
+        if not len(hashes): return
+        run = np.sort(hashes)
+        while self._runs and len(self._runs[-1]) <= len(run): run = np.sort(np.concatenate([self._runs.pop(), run]))
+        self._runs.append(run)
+
+class CsvPipeline:
+    """A compiled pipeline. apply() is called once per chunk; dedupe remembers row hashes across chunks."""
+    def __init__(self, stages):
+        self.stages = stages
+        self._seen_rows = RowHashSet()
+
+    def validate(self, columns):
+        """Checks every referenced column exists, allowing for columns derived by earlier steps."""
+        available = set(columns)
+        for kind, steps in self.stages:
+            for position, step in steps:
+                if 'expr' in step: needed = derive_expr_columns(parse_derive_expr(step['expr']))
+                else: needed = step.get('concat') or ([step['column']] if 'column' in step else step.get('columns', []))
+                if (missing := [c for c in needed if c not in available]): raise ValueError(f"Step {position} ({step['op']}): column not found: {', '.join(missing)}.")
+                if kind == 'derive': available.add(step['name'])
+
+    def apply(self, df):
+        for kind, steps in self.stages:
+            if kind == 'map':
+                plan = {}
+                for _, step in steps:
+                    for column in _step_columns(step, 0): plan.setdefault(column, []).append(step)
+                for column, column_steps in plan.items():
+                    series = df[column]
+                    for step in column_steps: series = CSV_COLUMN_OPS[step['op']](series, step)
+                    df[column] = series
+            elif kind == 'filter':
+                mask = np.ones(len(df), dtype=bool)
+                for _, step in steps: mask &= CSV_FILTERS[step['cmp']](df[step['column']], step.get('value')).fillna(False).to_numpy(dtype=bool)
+                df = df[mask]
+            elif kind == 'dedupe':
+                step = steps[0][1]
+                subset = step.get('columns', [step['column']] if 'column' in step else list(df.columns))
+                hashes = pd.util.hash_pandas_object(df[subset], index=False)
+                keep = ~hashes.duplicated().to_numpy() & ~self._seen_rows.contains(hashes.to_numpy())
+                self._seen_rows.add(hashes.to_numpy()[keep])
+                df = df[keep]
+            elif kind == 'derive':
+                step = steps[0][1]
+                if 'expr' in step: df[step['name']] = eval_derive_expr(parse_derive_expr(step['expr']), df)
+                else:
+                    parts = [_as_text(df[column]) for column in step['concat']]
+                    df[step['name']] = functools.reduce(lambda left, right: left + step.get('sep', '') + right, parts)
+        return df
+
+def compile_csv_pipeline(steps):
+    """Validates a list of pipeline steps and fuses adjacent column transforms and filters. Raises ValueError."""
+    if isinstance(steps, str):
+        try: steps = json.loads(steps)
+        except ValueError as e: raise ValueError(f"Pipeline is not valid JSON: {e}")
+    if not isinstance(steps, list) or not steps: raise ValueError("Pipeline must be a non-empty JSON list of steps.")
+    stages = []
+    for position, step in enumerate(steps, 1):
+        _validate_step(step, position)
+        kind = 'map' if step['op'] in CSV_COLUMN_OPS else step['op']
+        if stages and stages[-1][0] == kind and kind in ('map', 'filter'): stages[-1][1].append((position, step))
+        else: stages.append((kind, [(position, step)]))
+    return CsvPipeline(stages)
+
+def stream_csv_pipeline(file, steps, chunksize=None):
+    """
+    Runs a pipeline over `file` in chunks of `chunksize` rows and returns (generator of CSV text, None)
+    or (None, error). The first chunk is processed up front so bad steps or columns are reported
+    before any output is sent; after that memory stays bounded by one chunk.
+    """
+    try:
+        pipeline = compile_csv_pipeline(steps)
+        reader = read_csv_chunks(file, chunksize)
+    except ValueError as e:
+        return None, f"Error: {e}"
+    try:
+        first = next(reader, None)
+        if first is None: raise ValueError("The CSV file has no rows.")
+        pipeline.validate(first.columns)
+        first = pipeline.apply(first)
+    except Exception as e:  # Bad values for a step (e.g. comparing text to a number) surface here.
+        reader.close()
+        return None, f"Error: {e}"
+    def generate():
+        with reader:
+            for index, chunk in enumerate(itertools.chain([first], map(pipeline.apply, reader))):
+                buffer = io.StringIO()
+                chunk.to_csv(buffer, index=False, header=index == 0)
+                yield buffer.getvalue()
+    return generate(), None
+
+def _spooled_upload(file):
+    """Copies an upload to a temp file the response owns; Flask closes request.files when the view returns."""
+    upload = tempfile.TemporaryFile(dir=UPLOAD_FOLDER)
+    file.save(upload); upload.seek(0)
+    return upload
+
+def csv_pipeline_response(file, steps, download_name='processed_data.csv'):
+    """Streams the result of a pipeline over an uploaded CSV, or returns (error, 400)."""
+    upload = _spooled_upload(file)
+    rows, error = stream_csv_pipeline(upload, steps)
+    if error:
+        upload.close()
+        return error, 400
+    def body():
+        with upload: yield from rows
+    return Response(body(), mimetype='text/csv', headers={'Content-Disposition': f'attachment; filename="{download_name}"'})
+
 
 # --- Flask Routes ---
+HOME_CONTENT = """<div class="card"><h2>Level 1 Tasks</h2><ul class="task-list"><li><a href="/level1/string-reversal">String Reversal</a></li><li><a href="/level1/temp-conversion">Temp Conversion</a></li><li><a href="/level1/email-validator">Email Validator</a></li><li><a href="/level1/calculator">Calculator</a></li><li><a href="/level1/palindrome">Palindrome Checker</a></li></ul></div><div class="card"><h2>Level 2 Tasks</h2><ul class="task-list"><li><a href="/level2/guessing-game">Guessing Game</a></li><li><a href="/level2/password-strength">Password Strength</a></li><li><a href="/level2/fibonacci">Fibonacci Sequence</a></li><li><a href="/level2/word-count">Word Count</a></li></ul></div><div class="card"><h2>Level 3 Tasks</h2><ul class="task-list"><li><a href="/scraper">Alibaba RFQ Scraper</a></li><li><a href="/level3/visualization">Data Visualization</a></li><li><a href="/level3/automation">CSV Task Automation</a></li></ul></div>"""
+
 @app.route('/')
 def home():
-    # ... This route remains unchanged ...
-    home_content = """<div class="card"><h2>Level 1 Tasks</h2><ul class="task-list"><li><a href="/level1/string-reversal">String Reversal</a></li><li><a href="/level1/temp-conversion">Temp Conversion</a></li><li><a href="/level1/email-validator">Email Validator</a></li><li><a href="/level1/calculator">Calculator</a></li><li><a href="/level1/palindrome">Palindrome Checker</a></li></ul></div><div class="card"><h2>Level 2 Tasks</h2><ul class="task-list"><li><a href="/level2/guessing-game">Guessing Game</a></li><li><a href="/level2/password-strength">Password Strength</a></li><li><a href="/level2/fibonacci">Fibonacci Sequence</a></li><li><a href="/level2/word-count">Word Count</a></li></ul></div><div class="card"><h2>Level 3 Tasks</h2><ul class="task-list"><li><a href="/scraper">Alibaba RFQ Scraper</a></li><li><a href="/level3/visualization">Data Visualization</a></li><li><a href="/level3/automation">CSV Task Automation</a></li></ul></div>"""
-    return render_template_string(BASE_TEMPLATE, title="Home", content=home_content)
+    return render_static_page("Home", HOME_CONTENT)
+
+@app.route('/metrics')
+def metrics():
+    return Response(METRICS.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/assets/<name>')
+def static_asset(name):
+    if name not in STATIC_ASSETS: abort(404)
+    body, mimetype = STATIC_ASSETS[name]
+    response = Response(body, mimetype=mimetype)
+    response.set_etag(ASSET_VERSIONS[name])
+    response.cache_control.public = True
+    response.cache_control.max_age = 31536000
+    response.cache_control.immutable = True
+    return response.make_conditional(request)
 
 def render_task_page(title, description, form_content, result=None, is_file_upload=False):
-    # ... This helper function remains unchanged ...
     enctype = 'enctype="multipart/form-data"' if is_file_upload else ""
     result_html = f'<div class="result"><h3>Result:</h3><div>{result}</div></div>' if result is not None else ""
     content = f"""<div class="card"><h2>{title}</h2><p>{description}</p><form method="post" {enctype}>{form_content}<br><input type="submit" value="Execute"></form>{result_html}</div><a href="/" class="back-link">&larr; Back to Home</a>"""
-    return render_template_string(BASE_TEMPLATE, title=title, content=content)
+    return render_page(title, content) if result is not None else render_static_page(title, content)
 
 # ... Level 1 & 2 Routes remain unchanged ...
 @app.route('/level1/string-reversal', methods=['GET', 'POST'])
@@ -375,27 +1832,69 @@ def l2_password_strength():
 def l2_fibonacci():
     result = None
     if request.method == 'POST':
-        try: result = ", ".join(map(str, fibonacci_sequence(int(request.form['terms']))))
+        try:
+            if (terms := int(request.form['terms'])) < 1: raise ValueError
+            if terms > FIB_MAX_TERMS: result = f"Please enter at most {FIB_MAX_TERMS:,} terms."
+            elif terms <= FIB_INLINE_TERMS: result = ", ".join(map(str, iter_fibonacci(terms)))
+            else:
+                link = f'<a href="{url_for("l2_fibonacci_stream", terms=terms)}">Stream all {terms:,} terms</a>'
+                result = f"<p>First {FIB_INLINE_TERMS:,} of {terms:,} terms shown. {link}</p>" + ", ".join(map(str, iter_fibonacci(FIB_INLINE_TERMS)))
         except ValueError: result = "Please enter a positive integer."
-    form = '<label for="terms">Number of terms:</label><input type="number" name="terms" min="1" required>'
+    form = f'<label for="terms">Number of terms:</label><input type="number" name="terms" min="1" max="{FIB_MAX_TERMS}" required>'
     return render_task_page("Fibonacci Sequence", "Generates the Fibonacci sequence.", form, result)
+
+@app.route('/level2/fibonacci/sequence.txt')
+def l2_fibonacci_stream():
+    """Streams `terms` Fibonacci numbers from index `start` as chunked plain text."""
+    terms, start = request.args.get('terms', type=int), request.args.get('start', 0, type=int)
+    if terms is None or not 1 <= terms <= FIB_MAX_TERMS or not 0 <= start <= FIB_MAX_TERMS - terms:
+        return f"'terms' must be 1-{FIB_MAX_TERMS} and 'start' + 'terms' at most {FIB_MAX_TERMS}.", 400
+    return Response(stream_fibonacci(terms, start), mimetype='text/plain')
 @app.route('/level2/word-count', methods=['GET', 'POST'])
 def l2_word_count():
     result = None
+    result_id, page = request.args.get('result'), request.args.get('page', 1, type=int)
+    per_page = max(1, min(request.values.get('top_k', WORD_COUNT_TOP_K, type=int) or WORD_COUNT_TOP_K, 10000))
     if request.method == 'POST' and (file := request.files.get('file')):
-        try: result = count_words_in_file(file.read().decode('utf-8'))
+        try:
+            if (request.content_length or 0) > WORD_COUNT_PARALLEL_BYTES:
+                path = os.path.join(UPLOAD_FOLDER, f"upload_{uuid.uuid4().hex}.txt")
+                file.save(path)
+                try: counts = count_words_in_file(path)
+                finally: os.remove(path)
+            else:
+                counts = count_words_in_file(file.stream)
+            result_id, page = save_word_counts(counts), 1
         except Exception as e: result = f"Error processing file: {e}"
-    form = '<label for="file">Upload a text file:</label><input type="file" name="file" accept=".txt" required>'
-    return render_task_page("Word Count in File", "Counts word occurrences in a .txt file.", form, result, True)
+    if result_id and result is None:
+        if (loaded := load_word_counts_page(result_id, max(page, 1), per_page)) is None:
+            result = "This word count has expired. Please upload the file again."
+        else:
+            rows, summary = loaded
+            pages = max(1, -(-summary['distinct'] // per_page))
+            page_link = lambda p, label: f'<a href="{url_for("l2_word_count", result=result_id, page=p, top_k=per_page)}">{label}</a>'
+            nav = " | ".join(filter(None, [page_link(page - 1, "&larr; Previous") if page > 1 else "", f"Page {page} of {pages}", page_link(page + 1, "Next &rarr;") if page < pages else "", f'<a href="{url_for("download_word_counts", result_id=result_id)}">Download all counts (CSV)</a>']))
+            ranked = "<br>".join(f"{rank}. '{word}': {count}" for rank, (word, count) in enumerate(rows, 1 + (page - 1) * per_page))
+            result = f"<p>{summary['total']:,} words, {summary['distinct']:,} distinct. Most frequent first.</p>{ranked}<p>{nav}</p>"
+    form = f'<label for="file">Upload a text file:</label><input type="file" name="file" accept=".txt" required><label for="top_k">Words per page (top K):</label><input type="number" name="top_k" min="1" max="10000" value="{per_page}">'
+    return render_task_page("Word Count in File", "Counts word occurrences in a .txt file of any size.", form, result, True)
+
+@app.route('/level2/word-count/<result_id>.csv')
+def download_word_counts(result_id):
+    if not DATASET_ID_PATTERN.match(result_id): abort(404)
+    return send_from_directory(UPLOAD_FOLDER, f"wordcount_{result_id}.csv", as_attachment=True, download_name="word_counts.csv")
 
 
 # --- Level 3 & Scraper Routes ---
 @app.route('/scraper', methods=['GET', 'POST'])
 def scraper_page():
     if request.method == 'POST':
-        result_filename = run_alibaba_scraper()
-        session['last_scrape_result'] = result_filename
-        return redirect(url_for('scraper_results'))
+        urls = [line.strip() for line in request.form.get('urls', '').splitlines() if line.strip()]
+        if (invalid := [url for url in urls if urlsplit(url).scheme not in ('http', 'https')]):
+            return f"Invalid listing URL: {escape(invalid[0])}", 400
+        job_id = submit_scrape_job(urls)
+        session['last_scrape_job'] = job_id
+        return redirect(url_for('scraper_job', job_id=job_id))
 
     # --- MODIFIED: Updated instructions for the new URL ---
     content = """
@@ -412,27 +1911,64 @@ def scraper_page():
             <li>Click the button below to open the Alibaba RFQ page.</li>
             <li>In the <strong>new tab</strong>, log in to your account.</li>
             <li>After you see your RFQ dashboard, return to <strong>this tab</strong>.</li>
-            <li>Click "Start Scraping". The process may take several minutes.</li>
+            <li>Click "Start Scraping". The scrape runs in the background; its progress page refreshes automatically.</li>
         </ol>
         <p style="text-align:center; margin: 2rem 0;">
              <a href="https://i.alibaba.com/rfq-page" target="_blank" class="button-link" id="open-alibaba-btn">Step 1: Open Alibaba RFQ Page</a>
         </p>
         <form method="POST" style="text-align:center;">
+            <label for="urls" style="text-align:left;">Listing or category pages to crawl (optional, one per line):</label>
+            <textarea name="urls" id="urls" rows="4" placeholder="Leave empty to crawl the default RFQ page"></textarea>
             <button type="submit" id="start-scrape-btn">Step 2: Start Scraping</button>
         </form>
+        <h3>Export Stored RFQs</h3>
+        <p>Every scrape is merged into one de-duplicated store. Leave both dates empty to export everything.</p>
+        <form method="GET" action="/scraper/export.csv">
+            <label for="start">Seen From:</label><input type="date" name="start" id="start">
+            <label for="end">Seen Until:</label><input type="date" name="end" id="end">
+            <label for="by">Filter On:</label><select name="by" id="by"><option value="last_seen">Last Seen</option><option value="first_seen">First Seen</option></select>
+            <button type="submit">Download CSV</button>
+        </form>
     </div>
     """
-    return render_template_string(BASE_TEMPLATE, title="Web Scraper", content=content)
+    return render_static_page("Web Scraper", content)
 
 @app.route('/scraper/results')
 def scraper_results():
-    # ... This route remains unchanged ...
-    result = session.pop('last_scrape_result', None)
-    if result and ".csv" in result:
-        content = f"""<div class="card"><h2>Scraping Complete!</h2><p>The web scraper has finished. Download the data using the link below.</p><p style="text-align:center; margin-top: 2rem;"><a href="{url_for('download_scrape_file', filename=result)}" class="button-link">Download {result}</a></p><a href="/" class="back-link">&larr; Back to Home</a></div>"""
+    if not (job_id := session.get('last_scrape_job')): return redirect(url_for('scraper_page'))
+    return redirect(url_for('scraper_job', job_id=job_id))
+
+@app.route('/scraper/jobs/<job_id>')
+def scraper_job(job_id):
+    if not (job := load_scrape_job(job_id)): abort(404)
+    refresh = ""
+    if job['status'] == 'finished':
+        result = job['result']
+        failed = f" {result['failed']} pages failed and were skipped." if result.get('failed') else ""
+        content = f"""<div class="card"><h2>Scraping Complete!</h2><p>The web scraper has finished crawling {result.get('pages', 1)} pages: {result['new']} new RFQs were stored and {result['refreshed']} already-stored RFQs were seen again.{failed}</p><p style="text-align:center; margin-top: 2rem;"><a href="{url_for('export_rfqs', start=result['seen_at'])}" class="button-link">Download RFQs From This Run</a></p><p style="text-align:center;"><a href="{url_for('export_rfqs')}">Download every stored RFQ</a></p><a href="/" class="back-link">&larr; Back to Home</a></div>"""
+    elif job['status'] == 'failed':
+        content = f"""<div class="card"><h2>Scraping Failed</h2><div class="result"><strong>Details:</strong> {escape(job['error'] or 'An unknown error occurred.')}</div><a href="{url_for('scraper_page')}" class="back-link">&larr; Try Again</a></div>"""
     else:
-        content = f"""<div class="card"><h2>Scraping Failed</h2><div class="result"><strong>Details:</strong> {result or 'An unknown error occurred.'}</div><a href="{url_for('scraper_page')}" class="back-link">&larr; Try Again</a></div>"""
-    return render_template_string(BASE_TEMPLATE, title="Scraper Results", content=content)
+        refresh = '<meta http-equiv="refresh" content="3">'
+        content = f"""<div class="card"><h2>Scraping In Progress</h2><div class="alert alert-info"><strong>Status:</strong> {job['status'].title()} &mdash; {escape(job['progress'])}</div><p>Job <code>{job_id}</code> was queued at {job['created_at']}. This page refreshes every few seconds; you can also poll <a href="{url_for('scraper_job_status', job_id=job_id)}">its JSON status</a>.</p><a href="/" class="back-link">&larr; Back to Home</a></div>"""
+    return render_page("Scraper Results", refresh + content)
+
+@app.route('/scraper/jobs/<job_id>/status')
+def scraper_job_status(job_id):
+    if not (job := load_scrape_job(job_id)): return jsonify(error="Unknown job ID"), 404
+    return jsonify(job)
+
+@app.route('/scraper/export.csv')
+def export_rfqs():
+    start, end, by = request.args.get('start'), request.args.get('end'), request.args.get('by', 'last_seen')
+    try:
+        rows = export_rfqs_csv(start, end, by)
+        header = next(rows)  # Validates the range before the response starts streaming.
+    except ValueError as e:
+        return f"Invalid export range: {e}", 400
+    filename = f"alibaba_rfq_{start or 'all'}_{end or datetime.now().strftime('%Y-%m-%d')}.csv".replace(':', '')
+    body = (chunk for part in ([header], rows) for chunk in part)
+    return Response(body, mimetype='text/csv', headers={'Content-Disposition': f'attachment; filename="{filename}"'})
 
 @app.route('/scraper/download/<path:filename>')
 def download_scrape_file(filename):
@@ -440,44 +1976,197 @@ def download_scrape_file(filename):
 
 @app.route('/level3/visualization', methods=['GET', 'POST'])
 def l3_visualization():
-    # ... This route remains unchanged ...
     plot_options = ""
     plot_div = ""
     if request.method == 'POST':
         if 'file' in request.files and request.files['file'].filename != '':
             file = request.files['file']
             try:
-                filepath = os.path.join(UPLOAD_FOLDER, 'temp_data.csv')
-                file.save(filepath)
-                df = pd.read_csv(filepath)
+                with stage_timer('visualization', 'read'): dataset_id, df = save_dataset(file)
                 session['viz_columns'] = df.columns.tolist()
-                session['viz_file'] = 'temp_data.csv'
+                session['viz_dataset'] = dataset_id
             except Exception as e:
                 plot_div = f"<div class='result'><strong>Error:</strong> Could not read CSV file. {e}</div>"
-        elif 'generate_plot' in request.form and 'viz_file' in session:
-            filepath = os.path.join(UPLOAD_FOLDER, session['viz_file'])
-            df = pd.read_csv(filepath)
-            plot_div = generate_visualization(df=df, plot_type=request.form.get('plot_type'), x_col=request.form.get('x_col'), y_col=request.form.get('y_col'), color_col=request.form.get('color_col') or None)
+        elif 'generate_plot' in request.form and 'viz_dataset' in session:
+            columns = [c for c in dict.fromkeys([request.form.get('x_col'), request.form.get('y_col'), request.form.get('color_col')]) if c in session.get('viz_columns', [])]
+            with stage_timer('visualization', 'read'): df = load_dataset(session['viz_dataset'], columns or None)
+            if df is None:
+                session.pop('viz_dataset'); session.pop('viz_columns', None)
+                plot_div = "<p>Your uploaded data has expired. Please upload the CSV file again.</p>"
+            else:
+                plot_div = generate_visualization(df=df, plot_type=request.form.get('plot_type'), x_col=request.form.get('x_col'), y_col=request.form.get('y_col'), color_col=request.form.get('color_col') or None)
     if 'viz_columns' in session:
         cols = session['viz_columns']
         options_html = "".join([f'<option value="{c}">{c}</option>' for c in cols])
         plot_options = f"""<hr><label for="plot_type">Plot Type:</label><select name="plot_type"><option value="scatter">Scatter Plot</option><option value="bar">Bar Chart</option><option value="line">Line Chart</option><option value="histogram">Histogram</option></select><label for="x_col">X-Axis:</label><select name="x_col">{options_html}</select><label for="y_col">Y-Axis (not for Histogram):</label><select name="y_col">{options_html}</select><label for="color_col">Color By (Optional):</label><select name="color_col"><option value="">None</option>{options_html}</select><br><button type="submit" name="generate_plot" value="1">Generate Plot</button>"""
     content = f"""<div class="card"><h2>Data Visualization Tool</h2><p>Upload a CSV file to generate interactive plots.</p><form method="post" enctype="multipart/form-data"><label for="file">1. Upload CSV File:</label><input type="file" name="file" accept=".csv" onchange="this.form.submit()">{plot_options}</form>{ '<div class="result">' + plot_div + '</div>' if plot_div else '' }</div><a href="/" class="back-link">&larr; Back to Home</a>"""
-    return render_template_string(BASE_TEMPLATE, title="Data Visualization", content=content)
+    return render_page("Data Visualization", content)
 
 @app.route('/level3/automation', methods=['GET', 'POST'])
 def l3_automation():
-    # ... This route remains unchanged ...
     if request.method == 'POST':
         if not (file := request.files.get('file')): return "No file selected", 400
         try:
-            df = pd.read_csv(file)
+            if (steps := request.form.get('pipeline', '').strip()):
+                return csv_pipeline_response(file, steps)
+            if not request.form.get('column'): return "Enter a column name or a pipeline.", 400
+            if request.form.get('stream'):
+                return csv_pipeline_response(file, [{'op': request.form.get('operation'), 'column': request.form.get('column')}])
+            df = read_csv_frame(file, keep=[request.form.get('column')])
             processed_file, error = automate_csv_processing(df, request.form.get('column'), request.form.get('operation'))
             if error: return error, 400
             return send_file(processed_file, as_attachment=True, download_name='processed_data.csv', mimetype='text/csv')
         except Exception as e: return f"Error processing file: {e}", 500
-    form = """<label for="file">Upload a CSV file:</label><input type="file" name="file" accept=".csv" required><label for="column">Column Name to Process:</label><input type="text" name="column" required><label for="operation">Operation:</label><select name="operation"><option value="uppercase">Convert to Uppercase</option><option value="lowercase">Convert to Lowercase</option></select>"""
-    return render_task_page("CSV Task Automation", "Automates text transformations on a CSV column.", form, None, True)
+    form = """<label for="file">Upload a CSV file:</label><input type="file" name="file" accept=".csv" required><label for="column">Column Name to Process:</label><input type="text" name="column"><label for="operation">Operation:</label><select name="operation"><option value="uppercase">Convert to Uppercase</option><option value="lowercase">Convert to Lowercase</option></select><label><input type="checkbox" name="stream" value="1" checked> Stream the result (recommended for large files)</label><label for="pipeline">Or a multi-step pipeline (JSON, replaces the column and operation above):</label><textarea name="pipeline" rows="5" placeholder='[{"op": "strip", "columns": ["name", "city"]}, {"op": "filter", "column": "age", "cmp": ">=", "value": 18}, {"op": "dedupe", "columns": ["email"]}]'></textarea>"""
+    return render_task_page("CSV Task Automation", "Automates text transformations on CSV columns, one operation or a whole pipeline at a time.", form, None, True)
+
+@app.route('/api/v1/csv/pipeline', methods=['POST'])
+def api_csv_pipeline():
+    """Multipart `file` + `steps` (JSON), or a JSON body {"steps": [...], "csv": "..."}; responds with the processed CSV."""
+    if request.is_json:
+        body = request.get_json(silent=True) or {}
+        if not isinstance(body.get('csv'), str): return jsonify(error="JSON requests need 'steps' and a 'csv' string."), 400
+        rows, error = stream_csv_pipeline(io.StringIO(body['csv']), body.get('steps'))
+        if error: return jsonify(error=error), 400
+        return Response(rows, mimetype='text/csv')
+    if not (file := request.files.get('file')): return jsonify(error="Upload a CSV 'file' and its 'steps'."), 400
+    response = csv_pipeline_response(file, request.form.get('steps', ''))
+    return (jsonify(error=response[0]), 400) if isinstance(response, tuple) else response
+
+# --- Level 1/2 JSON API ---
+# Each task turns one input (a JSON object, or a bare value for its main field) into arguments and
+# runs a whole batch of parsed arguments at once, so the arithmetic tasks stay vectorized.
+def _api_field(item, field):
+    if field not in item: raise ValueError(f"Missing '{field}'.")
+    return item[field]
+
+def _api_text(field):
+    def parse(item):
+        if not isinstance(value := _api_field(item, field), str): raise ValueError(f"'{field}' must be a string.")
+        return value
+    return parse
+
+def _api_number(item, field):
+    if isinstance(value := _api_field(item, field), bool) or value is None: raise ValueError(f"'{field}' must be a number.")
+    try: number = float(value)
+    except (TypeError, ValueError): raise ValueError(f"'{field}' must be a number.") from None
+    if not math.isfinite(number): raise ValueError(f"'{field}' must be a finite number.")
+    return number
+
+def _api_choice(item, field, choices):
+    if (value := _api_field(item, field)) not in choices: raise ValueError(f"'{field}' must be one of: {', '.join(choices)}.")
+    return value
+
+def _api_index(field, limit):
+    def parse(item):
+        if isinstance(value := _api_field(item, field), bool) or not isinstance(value, int) or not 0 <= value <= limit:
+            raise ValueError(f"'{field}' must be an integer between 0 and {limit}.")
+        return value
+    return parse
+
+def _api_temperatures(batch):
+    celsius, fahrenheit = convert_temperatures([value for value, _ in batch], [unit for _, unit in batch])
+    return [{'result': {'celsius': c, 'fahrenheit': f}} if math.isfinite(c) and math.isfinite(f) else {'error': "Result is not a finite number."}
+            for c, f in zip(celsius.tolist(), fahrenheit.tolist())]
+
+def _api_calculations(batch):
+    results = calculate_many(*zip(*batch)) if batch else []
+    return [{'result': value} if math.isfinite(value) else {'error': "Division by zero." if op == '/' and n2 == 0 else "Result is not a finite number."}
+            for value, (_, n2, op) in zip(list(results), batch)]
+
+def _api_each(fn): return lambda batch: [{'result': fn(args)} for args in batch]
+
+API_TASKS = {
+    # task: (main field, parse(item) -> args, run(list of args) -> list of {"result"} / {"error"})
+    'string-reversal': ('text', _api_text('text'), _api_each(reverse_string)),
+    'temp-conversion': ('value', lambda item: (_api_number(item, 'value'), _api_choice(item, 'unit', ('celsius', 'fahrenheit'))), _api_temperatures),
+    'email-validator': ('email', _api_text('email'), _api_each(lambda email: EMAIL_PATTERN.match(email) is not None)),
+    'calculator': (None, lambda item: (_api_number(item, 'n1'), _api_number(item, 'n2'), _api_choice(item, 'op', tuple(CALCULATOR_UFUNCS))), _api_calculations),
+    'palindrome': ('text', _api_text('text'), _api_each(lambda text: is_palindrome(text) == "It's a palindrome.")),
+    'password-strength': ('password', _api_text('password'), _api_each(lambda password: {'score': (score := password_score(password)), 'strength': PASSWORD_STRENGTH[score]})),
+    # Longer sequences stream from /level2/fibonacci/sequence.txt instead of one JSON array.
+    'fibonacci': ('terms', _api_index('terms', FIB_INLINE_TERMS), _api_each(fibonacci_sequence)),
+    'fibonacci-number': ('n', _api_index('n', FIB_MAX_TERMS), _api_each(fibonacci_number)),
+}
+
+_INVALID_JSON = object()  # stands in for an NDJSON line that did not parse
+
+def run_api_batch(task, items):
+    """Runs `task` over a list of inputs; returns one {"result": ...} or {"error": ...} per input, in order."""
+    field, parse, run = API_TASKS[task]
+    results, parsed = [None] * len(items), []
+    for idx, item in enumerate(items):
+        if item is _INVALID_JSON: results[idx] = {'error': "Invalid JSON."}; continue
+        if not isinstance(item, dict) and not field: results[idx] = {'error': "Each input must be a JSON object."}; continue
+        if not isinstance(item, dict): item = {field: item}
+        try: parsed.append((idx, parse(item)))
+        except ValueError as e: results[idx] = {'error': str(e)}
+    for (idx, _), result in zip(parsed, run([args for _, args in parsed])): results[idx] = result
+    return results
+
+def _ndjson_results(task, lines):
+    """NDJSON result lines for NDJSON input lines, run API_MAX_BATCH inputs at a time."""
+    batch = []
+    for line in itertools.chain(lines, [None]):
+        if line is not None and line.strip():
+            try: batch.append(json.loads(line))
+            except ValueError: batch.append(_INVALID_JSON)
+        if batch and (line is None or len(batch) >= API_MAX_BATCH):
+            yield "".join(json.dumps(result) + "\n" for result in run_api_batch(task, batch))
+            batch = []
+
+@app.route('/api/v1/<task>', methods=['POST'])
+def api_task(task):
+    """
+    JSON API for the Level 1/2 tools. A JSON object (or a bare value for the task's main field) is one
+    input and gets {"result": ...}; a JSON array or {"inputs": [...]} is a batch and gets
+    {"results": [...]} in input order. An application/x-ndjson body (one input per line) is answered
+    with one NDJSON result line per input, streamed as it goes.
+    """
+    if task not in API_TASKS: return jsonify(error=f"Unknown task. Available: {', '.join(API_TASKS)}."), 404
+    if request.mimetype == 'application/x-ndjson':
+        lines = (line.decode('utf-8', errors='replace') for line in request.stream)
+        return Response(stream_with_context(_ndjson_results(task, lines)), mimetype='application/x-ndjson')
+    if (body := request.get_json(silent=True)) is None: return jsonify(error="Send a JSON object, a JSON array or NDJSON."), 400
+    if not isinstance(body, list) and not (isinstance(body, dict) and 'inputs' in body):
+        result = run_api_batch(task, [body])[0]
+        return jsonify(result), 400 if 'error' in result else 200
+    items = body.get('inputs') if isinstance(body, dict) else body
+    if not isinstance(items, list): return jsonify(error="'inputs' must be a JSON array."), 400
+    if len(items) > API_MAX_BATCH: return jsonify(error=f"Batches are limited to {API_MAX_BATCH} inputs; use NDJSON for more."), 413
+    return jsonify(results=run_api_batch(task, items))
+
+# --- CLI Commands ---
+@app.cli.command('crawl-rfq')
+@click.argument('urls', nargs=-1)
+@click.option('--crawl-id', help="Name the crawl; re-running with an existing ID resumes its unfinished URLs.")
+@click.option('--workers', type=int, default=None, help="Browser workers (default SCRAPER_CRAWL_WORKERS).")
+@click.option('--backend', type=click.Choice(['auto', 'http', 'selenium']), default=None, help="Fetch backend (default SCRAPER_BACKEND).")
+def crawl_rfq_command(urls, crawl_id, workers, backend):
+    """Crawls RFQ listing URLs into the RFQ store, e.g. `flask crawl-rfq URL [URL ...]`."""
+    if not crawl_id: crawl_id, urls = uuid.uuid4().hex, urls or RFQ_START_URLS
+    click.echo(f"Crawl ID: {crawl_id}")
+    totals = crawl_rfq_pages(list(urls), crawl_id, workers, progress=click.echo, backend=backend)
+    click.echo(f"{totals['new']} new RFQs, {totals['refreshed']} refreshed, pages: {totals['pages']}")
+    for url, error in totals['errors']: click.echo(f"FAILED {url}: {error}", err=True)
+
+@app.cli.command('csv-pipeline')
+@click.argument('inputs', nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option('--steps', required=True, help="Pipeline JSON, or a path to a .json file holding it.")
+@click.option('--output-dir', default='processed', show_default=True, type=click.Path(file_okay=False))
+@click.option('--chunksize', type=int, default=None, help="Rows per chunk (default CSV_CHUNK_ROWS).")
+def csv_pipeline_command(inputs, steps, output_dir, chunksize):
+    """Applies a CSV pipeline to each input file, writing results under --output-dir."""
+    if os.path.isfile(steps):
+        with open(steps, encoding='utf-8') as fh: steps = fh.read()
+    os.makedirs(output_dir, exist_ok=True)
+    for path in inputs:
+        with open(path, 'rb') as source:
+            rows, error = stream_csv_pipeline(source, steps, chunksize)
+            if error: raise click.ClickException(f"{path}: {error}")
+            target = os.path.join(output_dir, os.path.basename(path))
+            with open(target, 'w', encoding='utf-8', newline='') as out: out.writelines(rows)
+        click.echo(f"{path} -> {target}")
 
 # --- Run the App ---
 if __name__ == '__main__':
@@ -0,0 +1,70 @@
+"""
+Compares per-card RFQ parsing (one outerHTML string and one BeautifulSoup tree per card,
+as run_alibaba_scraper used to do) with app.parse_rfq_listing's single-pass lxml parse.
+Cards come from the saved fixtures/rfq_listing.html, repeated to reach each size.
+
+    python benchmarks/bench_extraction.py --sizes 10,100,500,1000
+"""
+import os
+import sys
+import time
+import argparse
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import app
+from rfq_fixtures import LISTING_FIXTURE
+
+def load_card_html():
+    with open(LISTING_FIXTURE, encoding='utf-8') as fh:
+        soup = BeautifulSoup(fh.read(), 'lxml')
+    return [str(card) for card in soup.select(app.RFQ_CARD_SELECTOR)]
+
+def per_card(card_html):
+    """The pre-bulk extraction loop: one soup and seven CSS selects per card."""
+    rows = []
+    for html in card_html:
+        soup = BeautifulSoup(html, 'lxml')
+        data = dict.fromkeys(app.RFQ_FIELDS, "N/A")
+        if not (title_tag := soup.select_one("a.brh-rfq-item__subject-link")): continue
+        data["Title"] = title_tag.get_text(strip=True)
+        data["Inquiry URL"] = "https:" + title_tag.get("href", "")
+        if (buyer := soup.select_one("div.brh-rfq-item__other-info div.text")): data["Buyer Name"] = buyer.get_text(strip=True)
+        if (buyer_img := soup.select_one("div.brh-rfq-item__other-info img")): data["Buyer Image"] = buyer_img.get('src')
+        if (posted := soup.select_one("div.brh-rfq-item__publishtime")): data["Inquiry Time"] = posted.get_text(strip=True)
+        data["Inquiry Date"] = data["Inquiry Time"]
+        if (quote := soup.select_one("div.brh-rfq-item__quote-left span")): data["Quotes Left"] = quote.get_text(strip=True)
+        if (country_img := soup.select_one("div.brh-rfq-item__country img")): data["Country"] = country_img.get('alt')
+        data["Scraping Date"] = '2024-01-01'
+        rows.append(data)
+    return rows
+
+def bulk(card_html):
+    return app.parse_rfq_listing("".join(card_html), scraping_date='2024-01-01')
+
+def best_of(fn, arg, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = fn(arg)
+        timings.append(time.perf_counter() - started)
+    return min(timings), rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='10,100,500,1000')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    fixture_cards = load_card_html()
+    print(f"{'cards':>6} {'per-card':>10} {'bulk':>10} {'speedup':>8}")
+    for size in map(int, args.sizes.split(',')):
+        card_html = [fixture_cards[i % len(fixture_cards)] for i in range(size)]
+        slow, slow_rows = best_of(per_card, card_html, args.repeat)
+        fast, fast_rows = best_of(bulk, card_html, args.repeat)
+        assert len(slow_rows) == len(fast_rows) == size and slow_rows == fast_rows, size
+        print(f"{size:>6} {slow * 1000:>8.1f}ms {fast * 1000:>8.1f}ms {slow / fast:>7.2f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Crawls server-rendered listing pages from the local fixture server into a throwaway RFQ store,
+with the async HTTP backend or, for comparison, the Selenium one (needs Chrome). Reports pages/s
+and this process's peak RSS (browser processes not included). --with-js-page adds a page that
+only renders its cards with JavaScript, which --backend auto hands to the browser workers.
+
+    python benchmarks/bench_fetch.py --pages 200 --concurrency 32 --latency 0.05
+    python benchmarks/bench_fetch.py --pages 20 --backend selenium
+"""
+import os
+import sys
+import time
+import argparse
+import resource
+import tempfile
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--cards', type=int, default=20, help='cards per listing page')
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds the fixture server waits before each response')
+    parser.add_argument('--concurrency', type=int, default=16, help='HTTP connections')
+    parser.add_argument('--backend', choices=['http', 'auto', 'selenium'], default='http')
+    parser.add_argument('--with-js-page', action='store_true', help='add a JS-rendered page (only --backend auto can scrape it)')
+    args = parser.parse_args()
+
+    # The crawl must not touch the real store or wait out the politeness delay on one local host.
+    os.environ['RFQ_DB_PATH'] = os.path.join(tempfile.mkdtemp(prefix='bench_fetch_'), 'rfq_store.sqlite3')
+    os.environ['SCRAPER_POLITENESS_DELAY'] = '0'
+    os.environ['SCRAPER_HTTP_CONCURRENCY'] = str(args.concurrency)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import app
+    from fixture_server import start_fixture_server
+
+    server = start_fixture_server(cards_per_page=args.cards, latency=args.latency)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = [f"{base}/rfq-page?page={page}&category=bench" for page in range(1, args.pages + 1)]
+    if args.with_js_page: urls.append(f"{base}/rfq_infinite_scroll.html?delay=100&batch=20&total=40")
+    try:
+        started = time.perf_counter()
+        totals = app.crawl_rfq_pages(urls, crawl_id=f"bench-{args.backend}", backend=args.backend)
+        elapsed = time.perf_counter() - started
+    finally:
+        server.shutdown()
+        app.DRIVER_POOL.close()
+    done = totals['pages'].get('done', 0)
+    print(f"{args.backend}: {done}/{len(urls)} pages, {totals['new']} new RFQs in {elapsed:.2f}s "
+          f"({done / elapsed:.1f} pages/s), peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f}MB")
+    for url, error in totals['errors']: print(f"  FAILED {url}: {error}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Compares the old fixed-sleep scrolling with app.scroll_until_loaded against a local
+infinite-scroll fixture page. Requires Chrome and the chromedriver used by the app.
+
+    python benchmarks/bench_scroll.py --delay 800 --batch 20 --total 120
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import app
+from fixture_server import start_fixture_server
+
+def fixed_sleep_scroll(driver):
+    """The scrolling strategy run_alibaba_scraper used before scroll_until_loaded."""
+    time.sleep(5)
+    for _ in range(5):
+        driver.execute_script("window.scrollBy(0, 1000);")
+        time.sleep(1.5)
+    time.sleep(3)
+    return len(driver.find_elements(app.selenium_by.By.CSS_SELECTOR, app.RFQ_CARD_SELECTOR))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--delay', type=int, default=800, help='ms the fixture waits before each batch')
+    parser.add_argument('--batch', type=int, default=20)
+    parser.add_argument('--total', type=int, default=120)
+    parser.add_argument('--target', type=int, default=0, help='stop after this many cards (0 = until the page stops growing)')
+    parser.add_argument('--idle', type=float, default=app.SCRAPER_SCROLL_IDLE)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    server = start_fixture_server()
+    url = f"http://127.0.0.1:{server.server_address[1]}/rfq_infinite_scroll.html?delay={args.delay}&batch={args.batch}&total={args.total}"
+    strategies = {
+        'fixed-sleep': fixed_sleep_scroll,
+        'conditional': lambda driver: app.scroll_until_loaded(driver, target_count=args.target, idle_timeout=args.idle),
+    }
+    try:
+        for name, strategy in strategies.items():
+            for run in range(1, args.repeat + 1):
+                with app.DRIVER_POOL.driver() as driver:
+                    started = time.perf_counter()
+                    driver.get(url)
+                    items = strategy(driver)
+                    elapsed = time.perf_counter() - started
+                print(f"{name:<12} run {run}: {elapsed:6.2f}s  {items:>4}/{args.total} items")
+    finally:
+        server.shutdown()
+        app.DRIVER_POOL.close()
+
+if __name__ == '__main__':
+    main()
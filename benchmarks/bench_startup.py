@@ -0,0 +1,93 @@
+"""
+Measures what a fresh worker pays to import app.py: wall time, resident memory after the
+import and after serving one Level 1 request, and the slowest packages from
+`python -X importtime`. Each measurement runs in its own interpreter, like a gunicorn worker.
+
+    python benchmarks/bench_startup.py                 # current app.py
+    python benchmarks/bench_startup.py --eager         # same, but preload the heavy packages first
+    python benchmarks/bench_startup.py --ref HEAD~1    # compare with app.py from another revision
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_PACKAGES = ['numpy', 'pandas', 'plotly', 'selenium', 'lxml']
+
+# Runs inside the child interpreter; prints one JSON line.
+PROBE = """
+import json, sys, time
+def rss_kb():
+    with open('/proc/self/status') as fh:
+        return next(int(line.split()[1]) for line in fh if line.startswith('VmRSS:'))
+if {eager}:
+    import numpy, pandas, plotly.express, plotly.io, selenium.webdriver, lxml.html
+started = time.perf_counter()
+import app
+import_s = time.perf_counter() - started
+after_import = rss_kb()
+loaded = [name for name in {heavy!r} if name in sys.modules]
+status = app.app.test_client().post('/level1/string-reversal', data={{'text': 'startup'}}).status_code
+print(json.dumps({{'import_s': import_s, 'rss_import_kb': after_import, 'rss_request_kb': rss_kb(), 'status': status, 'loaded': loaded}}))
+"""
+
+def probe(cwd, eager=False):
+    code = PROBE.format(eager=eager, heavy=HEAVY_PACKAGES)
+    out = subprocess.run([sys.executable, '-c', code], cwd=cwd, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def import_times(cwd, top):
+    """Packages app.py pulls in, ranked by cumulative import time (µs), from -X importtime."""
+    err = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'], cwd=cwd, capture_output=True, text=True, check=True).stderr
+    totals = {}
+    for line in err.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line: continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        # depth 0 is `app` itself (and interpreter startup); depth 1 is what app imports directly
+        if depth == 1 or (depth == 0 and name.strip() == 'app'):
+            package = name.strip().split('.')[0]
+            totals[package] = totals.get(package, 0) + int(cumulative)
+    return sorted(totals.items(), key=lambda item: -item[1])[:top]
+
+def checkout(ref, tmp):
+    """Writes app.py from `ref` into `tmp` so it can be imported side by side with the working tree."""
+    with open(os.path.join(tmp, 'app.py'), 'w', encoding='utf-8') as fh:
+        fh.write(subprocess.run(['git', 'show', f'{ref}:app.py'], cwd=ROOT, capture_output=True, text=True, check=True).stdout)
+    return tmp
+
+def best_of(cwd, repeat, eager):
+    runs = [probe(cwd, eager) for _ in range(repeat)]
+    return min(runs, key=lambda run: run['import_s'])
+
+def report(label, result, imports):
+    print(f"{label}: import {result['import_s'] * 1000:.0f}ms, "
+          f"RSS {result['rss_import_kb'] / 1024:.1f}MB after import, {result['rss_request_kb'] / 1024:.1f}MB after a Level 1 request "
+          f"(HTTP {result['status']})")
+    print(f"  heavy packages loaded: {', '.join(result['loaded']) or 'none'}")
+    for package, micros in imports:
+        print(f"  {package:<20} {micros / 1000:8.1f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ref', help='git revision whose app.py to measure alongside the working tree')
+    parser.add_argument('--eager', action='store_true', help='import the heavy packages before app, as the old module did')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--top', type=int, default=10, help='packages to list from -X importtime')
+    args = parser.parse_args()
+
+    targets = [('working tree', ROOT)]
+    tmp = tempfile.mkdtemp(prefix='bench_startup_') if args.ref else None
+    try:
+        if args.ref: targets.insert(0, (args.ref, checkout(args.ref, tmp)))
+        for label, cwd in targets:
+            report(label, best_of(cwd, args.repeat, args.eager), import_times(cwd, args.top))
+    finally:
+        if tmp: shutil.rmtree(tmp, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Local HTTP stand-in for the Alibaba RFQ pages, for exercising the scraper offline.
+
+    /rfq-page?page=N&category=NAME&cards=K   server-rendered listing, K cards per page
+    /<file>                                  anything in benchmarks/fixtures/
+
+Different pages and categories return different RFQs, so a crawl over several URLs
+exercises the store's de-duplication and merging.
+
+    python benchmarks/fixture_server.py --port 8765
+    flask --app app crawl-rfq "http://127.0.0.1:8765/rfq-page?page=1" "http://127.0.0.1:8765/rfq-page?page=2"
+    flask --app app crawl-rfq --backend http "http://127.0.0.1:8765/rfq-page?page=3"
+"""
+import os
+import sys
+import time
+import zlib
+import argparse
+import threading
+from functools import partial
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from rfq_fixtures import FIXTURES_DIR, render_rfq_page
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, so the HTTP scraper backend's connection pool is exercised
+    cards_per_page = 20
+    latency = 0.0
+
+    def do_GET(self):
+        if self.latency: time.sleep(self.latency)
+        parts = urlsplit(self.path)
+        if parts.path.rstrip('/') != '/rfq-page': return super().do_GET()
+        query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        page, cards = int(query.get('page', 1)), int(query.get('cards', self.cards_per_page))
+        category = query.get('category', 'all')
+        start = (zlib.crc32(category.encode()) % 1000) * 100000 + (page - 1) * cards
+        body = render_rfq_page(cards, start=start, title=f"RFQs: {category} page {page}").encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args): pass
+
+def start_fixture_server(port=0, cards_per_page=20, latency=0.0):
+    """Starts the fixture server on a daemon thread and returns it; its port is server.server_address[1]."""
+    handler = type('ConfiguredFixtureHandler', (FixtureHandler,), {'cards_per_page': cards_per_page, 'latency': latency})
+    server = ThreadingHTTPServer(('127.0.0.1', port), partial(handler, directory=FIXTURES_DIR))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--cards', type=int, default=20, help='cards per listing page')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds to wait before each response')
+    args = parser.parse_args()
+    server = start_fixture_server(args.port, args.cards, args.latency)
+    print(f"Serving RFQ fixtures on http://127.0.0.1:{server.server_address[1]}/rfq-page (Ctrl+C to stop)")
+    try:
+        while True: time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Synthetic Alibaba RFQ markup for offline benchmarks. Cards copy the structure the
+scraper's selectors expect (`div.brh-rfq-item` and its children).
+
+    python benchmarks/rfq_fixtures.py   # regenerates fixtures/rfq_listing.html
+"""
+import os
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+LISTING_FIXTURE = os.path.join(FIXTURES_DIR, 'rfq_listing.html')
+COUNTRIES = ['United States', 'Germany', 'India', 'Brazil', 'Australia', 'Canada']
+PRODUCTS = ['LED panel lights', 'Cotton t-shirts', 'Stainless steel bolts', 'Solar inverters', 'PET bottles', 'Bamboo flooring']
+
+def render_rfq_card(i):
+    rfq_id = 1000000 + i
+    return f"""<div class="brh-rfq-item" data-rfq-id="{rfq_id}">
+    <div class="brh-rfq-item__main">
+        <div class="brh-rfq-item__subject"><a class="brh-rfq-item__subject-link" href="//sourcing.alibaba.com/rfq/rfq_detail.htm?p={rfq_id}" target="_blank">Need {PRODUCTS[i % len(PRODUCTS)]} &ndash; order #{i}</a></div>
+        <div class="brh-rfq-item__detail">Quantity: {(i % 50 + 1) * 100} pieces. Please quote FOB price and lead time.</div>
+        <div class="brh-rfq-item__publishtime">Date Posted: {i % 24} hours ago</div>
+    </div>
+    <div class="brh-rfq-item__side">
+        <div class="brh-rfq-item__quote-left">Quotes Left <span>{i % 10}</span></div>
+        <div class="brh-rfq-item__country"><img src="//flags.example/{i % len(COUNTRIES)}.png" alt="{COUNTRIES[i % len(COUNTRIES)]}"></div>
+        <div class="brh-rfq-item__other-info"><img src="//buyers.example/{rfq_id}.png"><div class="text">Buyer {i}</div></div>
+        <button class="brh-rfq-item__quote-btn">Quote Now</button>
+    </div>
+</div>"""
+
+def render_rfq_page(cards, start=0, title="RFQ listing fixture"):
+    """A page shaped like i.alibaba.com/rfq-page with `cards` server-rendered RFQs."""
+    items = "\n".join(render_rfq_card(i) for i in range(start, start + cards))
+    nav = "\n".join(f'<li><a href="/category/{n}">Category {n}</a></li>' for n in range(40))
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="UTF-8"><title>{title}</title></head>
+<body>
+<header class="brh-header"><nav><ul>{nav}</ul></nav></header>
+<main class="brh-rfq-list">
+{items}
+</main>
+<footer class="brh-footer"><p>Fixture generated for offline scraper benchmarks.</p></footer>
+</body>
+</html>
+"""
+
+if __name__ == '__main__':
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    with open(LISTING_FIXTURE, 'w', encoding='utf-8') as fh: fh.write(render_rfq_page(40))
+    print(f"Wrote {LISTING_FIXTURE}")
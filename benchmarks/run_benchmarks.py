@@ -0,0 +1,162 @@
+"""
+Offline benchmark suite for the app's hot paths: word counting, CSV automation (the in-memory
+route and the streaming pipeline), plot generation and RFQ listing parsing. Inputs come from
+synthetic_data.py and the saved RFQ fixtures, so runs are reproducible without network or Chrome.
+
+Each case reports its best wall time over --repeat runs, its throughput, and the peak traced
+allocation from one extra run under tracemalloc. Results are written as JSON. --compare checks them
+against an earlier file and exits non-zero on a regression.
+
+    python benchmarks/run_benchmarks.py --out baseline.json
+    python benchmarks/run_benchmarks.py --csv-rows 10000,100000,1000000,10000000 --text-mb 10,100
+    python benchmarks/run_benchmarks.py --out current.json --compare baseline.json --threshold 0.15
+    python benchmarks/run_benchmarks.py --compare baseline.json --against current.json   # no run
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import subprocess
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import app
+from rfq_fixtures import LISTING_FIXTURE, render_rfq_page
+from synthetic_data import write_csv, write_corpus
+
+def measure(fn, repeat):
+    """(best seconds, peak traced MB) for fn(); timing runs are untraced, then one traced run."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return min(timings), peak / 1024 / 1024
+
+class Suite:
+    def __init__(self, data_dir, repeat):
+        self.data_dir, self.repeat, self.results = data_dir, repeat, []
+
+    def data_file(self, name, writer, size):
+        """Generates a synthetic input once per data directory and reuses it afterwards."""
+        path = os.path.join(self.data_dir, name)
+        if not os.path.exists(path): writer(path + '.partial', size); os.replace(path + '.partial', path)
+        return path
+
+    def run(self, name, size, items, unit, fn):
+        seconds, peak_mb = measure(fn, self.repeat)
+        result = {'name': name, 'size': size, 'items': items, 'unit': unit, 'seconds': round(seconds, 6),
+                  'throughput': round(items / seconds, 2) if seconds else None, 'peak_mb': round(peak_mb, 2)}
+        self.results.append(result)
+        print(f"{name:<34} {size:>10} {seconds * 1000:>10.1f}ms {result['throughput']:>14,.0f} {unit}/s {peak_mb:>9.1f}MB peak", flush=True)
+
+    def word_count(self, megabytes):
+        for mb in megabytes:
+            path = self.data_file(f"corpus_{mb}mb.txt", write_corpus, mb * 1024 * 1024)
+            # Above WORD_COUNT_PARALLEL_BYTES the count runs in worker processes, which tracemalloc does not see.
+            self.run('count_words_in_file', f"{mb}MB", os.path.getsize(path) / 1024 / 1024, 'MB', lambda: app.count_words_in_file(path))
+
+    def csv_automation(self, row_counts):
+        for rows in row_counts:
+            path = self.data_file(f"rows_{rows}.csv", write_csv, rows)
+            def in_memory():
+                processed, error = app.automate_csv_processing(app.pd.read_csv(path), 'name', 'uppercase')
+                assert error is None, error
+            def streamed():
+                with open(path, newline='') as fh:
+                    chunks, error = app.stream_csv_pipeline(fh, [{'op': 'strip', 'columns': ['city']}, {'op': 'uppercase', 'column': 'name'}, {'op': 'filter', 'column': 'age', 'cmp': '>=', 'value': 18}])
+                    assert error is None, error
+                    for _ in chunks: pass
+            self.run('automate_csv_processing', f"{rows:,}", rows, 'rows', in_memory)
+            self.run('stream_csv_pipeline', f"{rows:,}", rows, 'rows', streamed)
+
+    def visualization(self, row_counts):
+        for rows in row_counts:
+            with open(self.data_file(f"rows_{rows}.csv", write_csv, rows), 'rb') as fh:
+                df = app.read_csv_frame(fh, usecols=['id', 'score', 'city'], plot=True)
+            for plot_type, x_col, y_col in [('line', 'id', 'score'), ('scatter', 'id', 'score'), ('histogram', 'score', None)]:
+                def plot():
+                    with app.app.test_request_context():
+                        html = app.generate_visualization(df, plot_type, x_col, y_col, None)
+                    assert 'Error' not in html[:200], html[:200]
+                self.run(f"generate_visualization:{plot_type}", f"{rows:,}", rows, 'rows', plot)
+            del df
+
+    def rfq_parsing(self, card_counts):
+        with open(LISTING_FIXTURE, encoding='utf-8') as fh: fixture = fh.read()
+        assert len(app.parse_rfq_listing(fixture)) == 40, "saved fixture no longer parses"
+        for cards in card_counts:
+            html = render_rfq_page(cards)
+            self.run('parse_rfq_listing', f"{cards:,}", cards, 'cards', lambda: app.parse_rfq_listing(html))
+
+def compare(baseline, current, threshold):
+    """Prints each case that is in both runs and returns the regressions (slower or bigger by > threshold)."""
+    before = {(r['name'], r['size']): r for r in baseline['results']}
+    regressions = []
+    print(f"\n{'case':<46} {'time':>10} {'peak mem':>10}")
+    for result in current['results']:
+        if (old := before.get((result['name'], result['size']))) is None: continue
+        time_ratio = result['seconds'] / old['seconds'] if old['seconds'] else 1.0
+        memory_ratio = result['peak_mb'] / old['peak_mb'] if old['peak_mb'] else 1.0
+        flags = [label for label, ratio in [('time', time_ratio), ('memory', memory_ratio)] if ratio > 1 + threshold]
+        if flags: regressions.append((result['name'], result['size'], flags))
+        print(f"{result['name'] + ' ' + result['size']:<46} {time_ratio - 1:>+9.1%} {memory_ratio - 1:>+9.1%}  {'REGRESSION (' + ', '.join(flags) + ')' if flags else ''}")
+    return regressions
+
+def git_revision():
+    try: return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(app.__file__), capture_output=True, text=True).stdout.strip() or None
+    except OSError: return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--csv-rows', default='10000,100000,1000000', help='CSV sizes for automation and visualization (up to 10000000)')
+    parser.add_argument('--text-mb', default='1,10,100', help='word count corpus sizes in MB')
+    parser.add_argument('--cards', default='100,1000,5000', help='RFQ cards per parsed listing')
+    parser.add_argument('--only', help='comma-separated subset of: word_count, csv_automation, visualization, rfq_parsing')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--data-dir', help='keep generated inputs here between runs (default: a temporary directory)')
+    parser.add_argument('--out', help='write results JSON here')
+    parser.add_argument('--compare', metavar='BASELINE', help='results JSON to compare against')
+    parser.add_argument('--against', metavar='CURRENT', help='with --compare: compare this results JSON instead of running')
+    parser.add_argument('--threshold', type=float, default=0.10, help='relative slowdown or memory growth counted as a regression')
+    args = parser.parse_args()
+
+    if args.against:
+        with open(args.against, encoding='utf-8') as fh: current = json.load(fh)
+    else:
+        data_dir = args.data_dir or tempfile.mkdtemp(prefix='benchmarks_')
+        os.makedirs(data_dir, exist_ok=True)
+        sizes = lambda text: [int(float(part)) for part in text.split(',') if part]
+        cases = {'word_count': sizes(args.text_mb), 'csv_automation': sizes(args.csv_rows), 'visualization': sizes(args.csv_rows), 'rfq_parsing': sizes(args.cards)}
+        suite = Suite(data_dir, args.repeat)
+        try:
+            for case in (args.only.split(',') if args.only else cases):
+                getattr(suite, case)(cases[case])
+        finally:
+            if not args.data_dir: shutil.rmtree(data_dir, ignore_errors=True)
+        current = {'meta': {'timestamp': datetime.now().isoformat(timespec='seconds'), 'git': git_revision(), 'python': platform.python_version(),
+                            'platform': platform.platform(), 'cpus': os.cpu_count(), 'repeat': args.repeat}, 'results': suite.results}
+        if args.out:
+            with open(args.out, 'w', encoding='utf-8') as fh: json.dump(current, fh, indent=2)
+            print(f"Wrote {args.out}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as fh: baseline = json.load(fh)
+        if (regressions := compare(baseline, current, args.threshold)):
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}")
+            sys.exit(1)
+        print(f"\nNo regressions over {args.threshold:.0%}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Seeded synthetic inputs for the offline benchmarks: CSV uploads of any row count and plain-text
+corpora of any size. The same seed and size always produce the same file, so runs compare.
+
+    python benchmarks/synthetic_data.py csv 1000000 /tmp/rows_1m.csv
+    python benchmarks/synthetic_data.py text 50 /tmp/corpus_50mb.txt
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+CHUNK_ROWS = 500000
+FIRST_NAMES = ['alice', 'bob', 'carol', 'dmitri', 'eva', 'farid', 'grace', 'hiro', 'ines', 'jamal', 'kofi', 'lena']
+CITIES = ['  Berlin', 'Chennai ', 'Lagos', 'Lima', 'Osaka', 'São Paulo', 'Toronto', 'Warsaw', 'Sydney', 'Austin']
+VOCABULARY_SIZE = 20000
+
+def csv_frame(rows, start=0, seed=0):
+    """`rows` synthetic upload rows with ids from `start`: text, categorical, integer, float and date columns."""
+    rng = np.random.default_rng([seed, start])
+    ids = np.arange(start, start + rows)
+    names = np.array(FIRST_NAMES, dtype=object)[rng.integers(0, len(FIRST_NAMES), rows)]
+    return pd.DataFrame({
+        'id': ids,
+        'name': names + ' ' + pd.Series(ids).map('{:07d}'.format).to_numpy(dtype=object),
+        'city': np.array(CITIES, dtype=object)[rng.integers(0, len(CITIES), rows)],
+        'age': rng.integers(16, 90, rows),
+        'score': np.round(rng.normal(50, 15, rows), 3),
+        'signup': (np.datetime64('2020-01-01') + rng.integers(0, 1500, rows).astype('timedelta64[D]')).astype(str),
+        'email': names + pd.Series(ids).astype(str).to_numpy(dtype=object) + '@example.com',
+    })
+
+def write_csv(path, rows, seed=0):
+    """Writes `rows` synthetic rows to `path` in CHUNK_ROWS pieces (memory stays flat for 10M+ rows)."""
+    with open(path, 'w', encoding='utf-8', newline='') as fh:
+        for start in range(0, rows, CHUNK_ROWS):
+            csv_frame(min(CHUNK_ROWS, rows - start), start, seed).to_csv(fh, index=False, header=start == 0)
+    return path
+
+def _vocabulary(seed):
+    rng = np.random.default_rng(seed)
+    letters, weights = list('etaoinshrdlucmfwypvbgkjqxz'), 1 / np.arange(1, 27)
+    lengths = rng.integers(2, 11, VOCABULARY_SIZE)
+    return np.array([''.join(rng.choice(letters, n, p=weights / weights.sum())) for n in lengths], dtype=object)
+
+def write_corpus(path, size_bytes, seed=0):
+    """Writes about `size_bytes` of Zipf-distributed words with punctuation and some non-ASCII text."""
+    rng = np.random.default_rng(seed)
+    vocabulary = _vocabulary(seed)
+    vocabulary[rng.integers(0, VOCABULARY_SIZE, 200)] = ['café', 'naïve', 'straße', 'déjà', 'über'] * 40
+    written = 0
+    with open(path, 'w', encoding='utf-8') as fh:
+        while written < size_bytes:
+            words = vocabulary[(rng.zipf(1.3, 200000) - 1) % VOCABULARY_SIZE]
+            lines = [' '.join(words[i:i + 12]) + ('.' if i % 36 else ',') for i in range(0, len(words), 12)]
+            block = '\n'.join(lines) + '\n'
+            written += fh.write(block[:max(size_bytes - written, 0)] if written + len(block) > size_bytes else block)
+    return path
+
+if __name__ == '__main__':
+    if len(sys.argv) != 4 or sys.argv[1] not in ('csv', 'text'): sys.exit(__doc__)
+    kind, size, out = sys.argv[1], int(sys.argv[2]), os.path.abspath(sys.argv[3])
+    if kind == 'csv': write_csv(out, size)
+    else: write_corpus(out, size * 1024 * 1024)
+    print(f"Wrote {out} ({os.path.getsize(out) / 1024 / 1024:.1f}MB)")
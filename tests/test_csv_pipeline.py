@@ -0,0 +1,34 @@
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import app
+
+CSV = "age,score\n10,1.5\n20,2.5\n"
+
+def run_pipeline(steps):
+    return app.app.test_client().post('/api/v1/csv/pipeline', json={'csv': CSV, 'steps': steps})
+
+def test_derive_rejects_method_calls(tmp_path):
+    target = tmp_path / 'written_by_expr.csv'
+    response = run_pipeline([{'op': 'derive', 'name': 'x', 'expr': f"age.to_csv('{target}')"}])
+    assert response.status_code == 400
+    assert 'unsupported' in response.get_json()['error']
+    assert not target.exists()
+
+def test_derive_evaluates_arithmetic_and_comparisons():
+    response = run_pipeline([{'op': 'derive', 'name': 'x', 'expr': 'age * 2 + score'}, {'op': 'derive', 'name': 'adult', 'expr': 'age >= 18'}])
+    assert response.status_code == 200
+    assert response.get_data(as_text=True).splitlines() == ['age,score,x,adult', '10,1.5,21.5,False', '20,2.5,42.5,True']
+
+def stream(csv, steps, chunksize):
+    rows, error = app.stream_csv_pipeline(io.BytesIO(csv.encode()), steps, chunksize)
+    assert error is None, error
+    return ''.join(rows).splitlines()
+
+def test_dedupe_across_chunks_with_a_chunk_of_only_duplicates():
+    assert stream("a,b\n1,2\n3,4\n1,2\n3,4\n5,6\n", [{'op': 'dedupe'}], chunksize=2) == ['a,b', '1,2', '3,4', '5,6']
+
+def test_dedupe_across_chunks_keeps_int_columns_int_when_a_chunk_has_blanks():
+    assert stream("a,b\n1,x\n2,y\n1,x\n,z\n", [{'op': 'dedupe'}], chunksize=2) == ['a,b', '1,x', '2,y', ',z']